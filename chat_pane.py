@@ -1,17 +1,98 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QLineEdit, QPushButton, QHBoxLayout
-from PySide6.QtCore import Signal, Qt, Slot # Added Slot
-from PySide6.QtGui import QTextCursor # Added QTextCursor
-import markdown # Import markdown
+from PySide6.QtCore import Signal, Qt, Slot, QTimer, QRunnable, QThreadPool # Added Slot
+from PySide6.QtGui import QTextCursor, QTextBlockFormat, QTextCharFormat # Added QTextCursor
+import contextlib
+import functools
+import itertools
+import re
+from markdown_cache import md_to_html_cached
+
+@functools.lru_cache(maxsize=512)
+def _md_to_html(text: str, exts: tuple) -> str:
+    """Converts Markdown to HTML, caching results in memory and on disk."""
+    return md_to_html_cached(text, exts)
+
+_STREAM_MD_EXTENSIONS = ('fenced_code', 'nl2br')
+
+def _normalize_fences(md: str) -> str:
+    """Turns ```plain / ```text fences into bare ``` fences for better rendering."""
+    if '```' not in md:
+        return md
+    return md.replace("```plain\n", "```\n").replace("```text\n", "```\n")
+
+def _qt_len(text: str) -> int:
+    """Length of text in QTextDocument positions (UTF-16 code units)."""
+    return len(text.encode('utf-16-le')) // 2
+
+_LIST_ITEM_RE = re.compile(r"(?:[-*+]|\d+[.)])(?:\s|$)") # Bullet or numbered list marker at the start of a line
+
+def _find_block_boundary(text: str) -> int:
+    """Returns the end offset of the last complete Markdown block in text (0 if none).
+
+    A block ends after a blank line outside a fenced code block, or right after a closing fence. A blank line only
+    ends a block once the next line is known not to continue it: an indented line, or a list item after a list,
+    keeps the block (e.g. a loose list) open.
+    """
+    boundary = 0; in_fence = False; in_list = False; pending = None; start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        raw = text[start:] if end == -1 else text[start:end] # end == -1: last line is still being streamed
+        line = raw.strip()
+        if pending is not None and line:
+            if end == -1 and line.isdigit(): break # Could still become a numbered list item
+            if raw[0] in " \t" or (in_list and _LIST_ITEM_RE.match(line)):
+                pending = None # Continues the open block
+            else:
+                boundary = pending; pending = None; in_list = False
+        if end == -1: break
+        start = end + 1
+        if line.startswith("```"):
+            in_fence = not in_fence
+            if not in_fence: boundary = start; pending = None; in_list = False
+        elif in_fence:
+            continue
+        elif not line:
+            pending = start
+        elif _LIST_ITEM_RE.match(line):
+            in_list = True
+    return boundary
+
+class _MdJob(QRunnable):
+    """Renders Markdown on a pool thread and reports back through ChatPane.md_ready."""
+    def __init__(self, pane, job_id, text, exts):
+        super().__init__()
+        self._pane = pane; self._job_id = job_id; self._text = text; self._exts = exts
+
+    def run(self):
+        try:
+            html, error = _md_to_html(self._text, self._exts), ""
+        except Exception as e:
+            html, error = "", str(e)
+        self._pane.md_ready.emit(self._job_id, html, error) # Queued to the GUI thread
 
 class ChatPane(QWidget):
     user_message_submitted = Signal(str)
+    md_ready = Signal(int, str, str) # job id, html, error message (emitted from pool threads)
+
+    # Sender prefixes for chat entries (fixed per message kind)
+    _USER_PREFIX = "<b style='color: #aaddff;'>User:</b> " # Example user color
+    _ERROR_PREFIX = "<b style='color: #ffaaaa;'>Error:</b> "
+    _STATUS_PREFIX_TMPL = "<i style='color: #cccccc;'>[{}]:</i> "
+    _SENDER_PREFIX_TMPL = "<b>{}:</b> "
+    _MD_ERROR_PREFIX_TMPL = "<b>{} (Markdown Error):</b> "
+
+    DEFAULT_MAX_HISTORY_BLOCKS = 4000 # Bounds memory and per-insert layout work in long sessions
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_history_blocks=DEFAULT_MAX_HISTORY_BLOCKS):
         super().__init__(parent)
         layout = QVBoxLayout(self)
 
+        # Rich-text widget: QPlainTextEdit's layout drops list markers, indents and block margins of rendered Markdown
         self.chat_history = QTextEdit()
         self.chat_history.setReadOnly(True)
+        self._doc = self.chat_history.document() # Stream edits go to the document directly
+        self._doc.setMaximumBlockCount(max_history_blocks) # Oldest lines roll off to cap memory (0 = unlimited)
+        self._end_cursor = QTextCursor(self._doc) # Reused for every append; see _cursor_at_end()
         # Allow rich text interaction if needed later (e.g., copying code)
         # self.chat_history.setTextInteractionFlags(Qt.TextSelectableByMouse | Qt.TextSelectableByKeyboard)
 
@@ -33,7 +114,18 @@ class ChatPane(QWidget):
         self._is_streaming = False
         self._current_stream_sender = ""
         self._current_stream_markdown = "" # Store full markdown content for current stream
-        self._stream_start_cursor_pos = -1 # Store cursor position where stream started
+        self._stream_start_cursor = None # Cursor pinned where not-yet-rendered stream text starts
+        self._open_block_md = "" # Streamed markdown after the last block rendered to HTML
+        self._pending_chunk_buf = [] # Chunks received since the last flush
+        self._md_jobs = {} # job id -> (start, end) cursors around plain text awaiting its HTML
+        self._md_job_ids = itertools.count()
+        self.md_ready.connect(self._apply_md_result)
+
+        # Coalesce chunk inserts into at most one document edit per frame (~30 fps)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(33)
+        self._flush_timer.timeout.connect(self._flush_pending_chunks)
 
     # <<< MODIFIED add_message >>>
     def add_message(self, sender, message, is_status=False, is_error=False, is_user=False):
@@ -43,33 +135,52 @@ class ChatPane(QWidget):
              print("[ChatPane WARN] add_message called while another stream is active. Finishing previous stream visually.")
              self._finalize_stream_visuals() # Attempt to clean up previous stream
 
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.chat_history.setTextCursor(cursor)
-
         # Basic HTML formatting for sender
         if is_user:
-            prefix = f"<b style='color: #aaddff;'>User:</b> " # Example user color
+            prefix = self._USER_PREFIX
         elif is_error:
-            prefix = f"<b style='color: #ffaaaa;'>Error:</b> "
+            prefix = self._ERROR_PREFIX
             message = message.replace('\n', '<br>') # Basic newline handling for errors
         elif is_status:
-            prefix = f"<i style='color: #cccccc;'>[{sender}]:</i> "
+            prefix = self._STATUS_PREFIX_TMPL.format(sender)
             message = message.replace('\n', '<br>') # Basic newline handling for status
         else: # Gemini or other non-user/status/error
-             prefix = f"<b>{sender}:</b> "
+             prefix = self._SENDER_PREFIX_TMPL.format(sender)
              # Convert message *content* from Markdown to HTML for non-status/error
              # Use fenced_code for ``` blocks
              try:
-                 html_content = markdown.markdown(message, extensions=['fenced_code'])
+                 html_content = _md_to_html(message, ('fenced_code',))
                  message = html_content # Replace original message with HTML
              except Exception as e:
                  print(f"[ChatPane ERROR] Markdown conversion failed: {e}")
-                 prefix = f"<b>{sender} (Markdown Error):</b> "
+                 prefix = self._MD_ERROR_PREFIX_TMPL.format(sender)
                  message = message.replace('\n', '<br>') # Fallback formatting
 
-        self.chat_history.insertHtml(prefix + message + "<br>") # Insert HTML prefix + content
-        self.chat_history.ensureCursorVisible() # Auto-scroll
+        stick = self._at_bottom()
+        self._append_html(prefix + message)
+        if stick: self._scroll_to_bottom() # Auto-scroll unless the user is reading scrollback
+
+    def _append_html(self, html):
+        """Appends html as a new paragraph at the end of the history without moving the view's cursor."""
+        cursor = self._cursor_at_end()
+        with self._batched_edit(cursor):
+            if not self._doc.isEmpty():
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertHtml(html)
+
+    def _cursor_at_end(self):
+        """Returns the shared document cursor, moved to the end (not the widget's: setTextCursor() would force a scroll)."""
+        self._end_cursor.movePosition(QTextCursor.End)
+        return self._end_cursor
+
+    def _at_bottom(self):
+        """True if the chat view is scrolled to (or within a few lines of) the end."""
+        sb = self.chat_history.verticalScrollBar()
+        return sb.value() >= sb.maximum() - 4
+
+    def _scroll_to_bottom(self):
+        sb = self.chat_history.verticalScrollBar()
+        sb.setValue(sb.maximum())
 
     # --- Slots for Streaming Signals ---
     @Slot(str, str)
@@ -85,17 +196,21 @@ class ChatPane(QWidget):
         self._is_streaming = True
         self._current_stream_sender = sender
         self._current_stream_markdown = "" # Reset markdown buffer
-
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.chat_history.setTextCursor(cursor)
+        self._open_block_md = ""
 
         # Add sender prefix
-        prefix = f"<b>{sender}:</b> "
-        self.chat_history.insertHtml(prefix)
-        self._stream_start_cursor_pos = cursor.position() # Store position *after* prefix
-
-        self.chat_history.ensureCursorVisible()
+        prefix = self._SENDER_PREFIX_TMPL.format(sender)
+        stick = self._at_bottom()
+        cursor = self._cursor_at_end()
+        with self._batched_edit(cursor):
+            if not self._doc.isEmpty(): # New paragraph, like _append_html()
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertHtml(prefix)
+        # Pin position *after* prefix; stays put as chunks are inserted there
+        self._stream_start_cursor = QTextCursor(cursor)
+        self._stream_start_cursor.setKeepPositionOnInsert(True)
+
+        if stick: self._scroll_to_bottom()
 
     @Slot(str)
     def handle_stream_chunk(self, chunk):
@@ -105,17 +220,53 @@ class ChatPane(QWidget):
              print("[ChatPane WARN] Received stream chunk but not in streaming state.")
              return
 
-        # Append raw text chunk for now
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.chat_history.setTextCursor(cursor)
-        # Replace potential ```plain or ```text directives for better rendering later
-        chunk = chunk.replace("```plain\n", "```\n").replace("```text\n", "```\n")
-        self.chat_history.insertPlainText(chunk)
-        self.chat_history.ensureCursorVisible()
-
-        # Append to our internal markdown buffer
+        # Append to our internal markdown buffer; the raw text is inserted on the next flush
         self._current_stream_markdown += chunk
+        self._pending_chunk_buf.append(chunk)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_pending_chunks(self):
+        """Inserts all buffered stream chunks with a single document edit."""
+        self._flush_timer.stop()
+        if not self._pending_chunk_buf:
+            return
+        text = "".join(self._pending_chunk_buf).replace("\r\n", "\n") # Qt stores \r\n as one separator
+        self._pending_chunk_buf.clear()
+        stick = self._at_bottom()
+        cursor = self._cursor_at_end()
+        with self._batched_edit(cursor): # Insert + block swaps lay out once
+            cursor.insertText(text)
+            self._open_block_md += text
+            self._commit_finished_blocks()
+        if stick: self._scroll_to_bottom()
+
+    def _commit_finished_blocks(self):
+        """Renders completed Markdown blocks of the open stream text and swaps them in as HTML."""
+        split = _find_block_boundary(self._open_block_md)
+        if split == 0 or self._stream_start_cursor is None:
+            return
+        block_md = self._open_block_md[:split]
+        self._open_block_md = self._open_block_md[split:]
+
+        cursor = self.chat_history.textCursor()
+        start = self._stream_start_cursor.position()
+        cursor.setPosition(start)
+        cursor.setPosition(start + _qt_len(block_md), QTextCursor.KeepAnchor)
+        if not block_md.strip():
+            cursor.removeSelectedText() # Only separator lines, nothing to render
+            return
+        try:
+            html_content = _md_to_html(_normalize_fences(block_md), _STREAM_MD_EXTENSIONS)
+        except Exception as e:
+            print(f"[ChatPane ERROR] Markdown conversion failed for streamed block: {e}")
+            cursor.setPosition(start + _qt_len(block_md)) # Leave block as plain text
+        else:
+            cursor.removeSelectedText()
+            cursor.insertHtml(html_content)
+            # Keep the remaining stream text in its own, unformatted paragraph
+            cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+        self._stream_start_cursor.setPosition(cursor.position())
 
     @Slot(str, str)
     def handle_stream_finished(self, sender, context_type):
@@ -138,11 +289,9 @@ class ChatPane(QWidget):
 
         print(f"[ChatPane] Stream error for '{self._current_stream_sender}': {error_message}")
         if self._is_streaming:
+            self._flush_pending_chunks() # Show whatever arrived before the error
             # If we were streaming, add a newline to separate the error clearly
-            cursor = self.chat_history.textCursor()
-            cursor.movePosition(QTextCursor.End)
-            self.chat_history.setTextCursor(cursor)
-            self.chat_history.insertPlainText("\n") # Add separation
+            self._cursor_at_end().insertText("\n") # Add separation
         # Add the error message using the standard method
         self.add_message("Error", error_message, is_error=True)
 
@@ -150,54 +299,75 @@ class ChatPane(QWidget):
         self._is_streaming = False
         self._current_stream_sender = ""
         self._current_stream_markdown = ""
-        self._stream_start_cursor_pos = -1
+        self._open_block_md = ""
+        self._stream_start_cursor = None
 
     def _finalize_stream_visuals(self):
-        """Converts the streamed markdown to HTML and replaces the plain text."""
-        if self._stream_start_cursor_pos == -1 or not self._current_stream_markdown:
+        """Queues the last (unterminated) streamed block for HTML conversion and ends the stream."""
+        self._flush_pending_chunks() # Make sure every received chunk is in the document
+        if self._stream_start_cursor is None or not self._current_stream_markdown:
              print("[ChatPane DEBUG] Finalize visuals called with no start position or no content.")
              self._reset_stream_state()
              return
+        if not self._open_block_md.strip(): # Everything was already rendered block by block
+             self._reset_stream_state()
+             return
 
-        cursor = self.chat_history.textCursor()
-        # Select the plain text that was inserted during the stream
-        cursor.setPosition(self._stream_start_cursor_pos)
-        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor) # Select to end
-        # Check if selection actually contains the streamed content (basic check)
-        # A more robust check might be needed if user interacts mid-stream
-        # selected_text = cursor.selectedText()
-        # if selected_text != self._current_stream_markdown.replace('\r\n', '\n'):
-        #     print("[ChatPane WARN] Text selection mismatch on finalize. History may have changed.")
-             # Fallback: just append HTML? Or log error?
-             # For now, proceed, but this indicates potential issues.
-
-        # Convert the stored full markdown message to HTML
-        try:
-             # Using 'fenced_code' for ```python ... ``` blocks
-             # Using 'nl2br' to convert single newlines to <br> (common Markdown behavior)
-             # Using 'codehilite' requires pygments, add if needed: extensions=['fenced_code', 'nl2br', 'codehilite']
-             html_content = markdown.markdown(self._current_stream_markdown, extensions=['fenced_code', 'nl2br'])
-             # Remove the selected plain text
-             cursor.removeSelectedText()
-             # Insert the final HTML content
-             cursor.insertHtml(html_content + "<br>") # Add final break
+        # Bracket the plain text inserted during the stream; both markers survive later appends
+        start = QTextCursor(self._stream_start_cursor)
+        start.setKeepPositionOnInsert(True)
+        end = QTextCursor(self._cursor_at_end())
+        end.setKeepPositionOnInsert(True)
+
+        # Convert the remaining markdown to HTML off the GUI thread (earlier blocks were converted
+        # while streaming); the plain text stays visible until _apply_md_result swaps it out
+        job_id = next(self._md_job_ids)
+        self._md_jobs[job_id] = (start, end)
+        QThreadPool.globalInstance().start(_MdJob(self, job_id, _normalize_fences(self._open_block_md), _STREAM_MD_EXTENSIONS))
+        self._reset_stream_state()
+
+    @Slot(int, str, str)
+    def _apply_md_result(self, job_id, html_content, error):
+        """Replaces a finished stream's remaining plain text with its rendered HTML."""
+        markers = self._md_jobs.pop(job_id, None)
+        if markers is None:
+            return
+        start, end = markers
+        stick = self._at_bottom()
+        if error:
+             print(f"[ChatPane ERROR] Markdown conversion failed during finalization: {error}")
+             # Leave the plain text as is, but add an error note
+             self._append_html(f"<i style='color:red;'>[Markdown rendering failed: {error}]</i>")
+        elif start.position() < end.position(): # Empty if the text already rolled off the history
+             cursor = QTextCursor(self._doc)
+             cursor.setPosition(start.position())
+             cursor.setPosition(end.position(), QTextCursor.KeepAnchor)
+             # Swap the selected plain text for the final HTML content in one edit
+             with self._batched_edit(cursor):
+                 cursor.removeSelectedText()
+                 cursor.insertHtml(html_content)
              print("[ChatPane DEBUG] Replaced streamed plain text with formatted HTML.")
-        except Exception as e:
-             print(f"[ChatPane ERROR] Markdown conversion failed during finalization: {e}")
-             # Leave the plain text as is, maybe add an error note?
-             cursor.movePosition(QTextCursor.End)
-             self.chat_history.setTextCursor(cursor)
-             self.chat_history.insertHtml(f"<br><i style='color:red;'>[Markdown rendering failed: {e}]</i><br>")
+        if stick: self._scroll_to_bottom()
 
-        self.chat_history.ensureCursorVisible()
-        self._reset_stream_state()
+    @contextlib.contextmanager
+    def _batched_edit(self, cursor):
+        """Groups document edits into one layout pass and drops intermediate change signals."""
+        self._doc.blockSignals(True)
+        cursor.beginEditBlock()
+        try:
+            yield cursor
+        finally:
+            cursor.endEditBlock()
+            self._doc.blockSignals(False)
 
     def _reset_stream_state(self):
         """Resets internal streaming state variables."""
         self._is_streaming = False
         self._current_stream_sender = ""
         self._current_stream_markdown = ""
-        self._stream_start_cursor_pos = -1
+        self._open_block_md = ""
+        self._stream_start_cursor = None
+        self._pending_chunk_buf.clear()
 
     def send_message(self):
         message = self.input_area.text().strip()
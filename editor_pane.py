@@ -1,13 +1,128 @@
 # --- START OF FILE editor_pane.py ---
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, QTabWidget, QTabBar,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPlainTextEdit, QTabWidget, QTabBar,
                                QPushButton, QStyle, QHBoxLayout, QFileDialog, QMessageBox) # Added imports
-from PySide6.QtCore import Signal, Qt, QDir, Slot # Added QDir, Slot
+from PySide6.QtCore import Signal, Qt, QDir, Slot, QTimer, QObject, QRunnable, QThreadPool, QFileSystemWatcher # Added QDir, Slot
 from PySide6.QtGui import QSyntaxHighlighter, QFont, QTextCursor # Added QFont, QSyntaxHighlighter, QTextCursor
+import logging
+import mmap
 import os
+import tempfile
 
 # Import the highlighter
 from syntax_highlighter import PythonHighlighter
+from text_encoding import decode_text
+
+logger = logging.getLogger(__name__)
+
+# Files above this many characters are inserted in slices across event loop passes instead of all at once
+CHUNKED_LOAD_THRESHOLD = 2 * 1024 * 1024
+_LOAD_SLICE_CHARS = 64 * 1024
+_LOAD_SLICES_PER_PASS = 8 # Slices inserted before yielding back to the event loop
+
+# Files at or above this many characters open without syntax highlighting (QSyntaxHighlighter stalls on them)
+LARGE_FILE_THRESHOLD = 512 * 1024
+
+def _norm_path(path):
+    """Key for the open-tab lookup; resolves symlinks, relative parts and (on Windows) case so one file maps to one tab."""
+    return os.path.normcase(os.path.realpath(path))
+
+_UMASK = os.umask(0); os.umask(_UMASK) # Read once at import, before any worker threads create files
+
+_MMAP_THRESHOLD = 1_000_000 # Files larger than this are decoded straight from an mmap (no bytes copy)
+
+def _disk_state(st):
+    """(mtime_ns, size) of a stat result: what the reload fast path compares."""
+    return (st.st_mtime_ns, st.st_size)
+
+def _load_file_text(path):
+    """Reads a text file with a single binary read and returns (content, encoding_used, disk_state).
+
+    disk_state comes from fstat on the same descriptor, before reading: a change racing the read leaves it
+    older than the file, so the next reload reads again instead of trusting stale content.
+    """
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size <= _MMAP_THRESHOLD:
+            return (*decode_text(f.read()), _disk_state(st))
+        # Large file: decode straight out of the mapping, without an intermediate bytes copy
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return (*decode_text(mm), _disk_state(st))
+
+def _write_file_atomic(path, data):
+    """Writes bytes to a uniquely named temp file next to path, then renames it over path (no half-written files).
+    Returns the disk state of the written file."""
+    path = os.path.realpath(path) # Replace the target, not a symlink pointing at it
+    try: mode = os.stat(path).st_mode & 0o7777 # Keep the existing file's permissions
+    except OSError: mode = 0o666 & ~_UMASK # New file: what open() would have created
+    # Unique hidden name: never clobbers a user's "foo.py.tmp", and concurrent saves don't share a temp file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        try:
+            if hasattr(os, "fchmod"): os.fchmod(fd, mode) # mkstemp creates the file as 0600
+            view = memoryview(data)
+            while view: view = view[os.write(fd, view):] # os.write may write less than asked
+            os.fsync(fd)
+            st = os.fstat(fd) # The file renamed over path below, not whatever path holds later
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+        return _disk_state(st)
+    except BaseException:
+        try: os.unlink(tmp) # Only our own temp file; don't leave it next to the file
+        except OSError: pass
+        raise
+
+def _changed_span(old, new):
+    """Returns (start, old_end, new_end): old[start:old_end] must become new[start:new_end] to turn old into new."""
+    limit = min(len(old), len(new))
+    lo, hi = 0, limit # Binary search on slice compares: C-speed, unlike a per-character loop
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]: lo = mid
+        else: hi = mid - 1
+    start = lo
+    lo, hi = 0, limit - start # Common suffix, not overlapping the prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]: lo = mid
+        else: hi = mid - 1
+    return start, len(old) - lo, len(new) - lo
+
+def _utf16_len(text):
+    """Length of text in UTF-16 code units, the unit QTextCursor positions count in."""
+    return len(text) if text.isascii() else len(text.encode('utf-16-le')) // 2
+
+class CodeEdit(QPlainTextEdit): # Line-based layout: stays responsive on large source files
+    """Editor tab widget; per-file state lives in plain attributes (no QVariant round-trip per read)."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_path = None
+        self.base_title = "" # Tab title without the '*' modified marker
+        self.path_valid = False # File exists on disk (kept current by the file watcher)
+        self.loading = False # Content not (fully) in the document yet
+        self.awaiting_content = False # No loader result applied yet
+        self.highlight_disabled = False # Too large for the PythonHighlighter
+        self.disk_mtime = None # st_mtime_ns / st_size when last read or saved
+        self.disk_size = None
+
+class _FileLoaderSignals(QObject):
+    loaded = Signal(str, str, str, object) # path, content, encoding used, disk state when read
+    failed = Signal(str, str) # path, error message
+
+class _FileLoader(QRunnable):
+    """Reads and decodes a file on a pool thread; results arrive on the GUI thread via signals."""
+    def __init__(self, path, signals):
+        super().__init__()
+        self.path = path; self.signals = signals
+
+    def run(self):
+        try:
+            content, encoding_used, disk_state = _load_file_text(self.path)
+        except Exception as e:
+            self.signals.failed.emit(self.path, str(e))
+        else:
+            self.signals.loaded.emit(self.path, content, encoding_used, disk_state)
 
 class EditorPane(QWidget):
     # Signal to request status bar updates in MainWindow
@@ -44,6 +159,7 @@ class EditorPane(QWidget):
         toolbar_layout.addWidget(self.reload_button)
 
         toolbar_layout.addStretch(1) # Push buttons to the left
+        self._button_states = (False, False) # (save, reload) as last applied to the buttons
 
         layout.addLayout(toolbar_layout)
         # --- End Toolbar ---
@@ -51,17 +167,39 @@ class EditorPane(QWidget):
         self.tab_widget = QTabWidget()
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
-        self.tab_widget.currentChanged.connect(self.update_button_states) # Update buttons on tab change
+        self.tab_widget.currentChanged.connect(self._on_current_tab_changed) # Update buttons on tab change
         # self.tab_widget.setMovable(True) # Allow reordering tabs
 
         layout.addWidget(self.tab_widget)
 
+        # Monospace editor font, built once (QFont needs the QGuiApplication, so not at import time)
+        self._editor_font = QFont("Monospace"); self._editor_font.setStyleHint(QFont.TypeWriter)
+        self._editor_font.setFixedPitch(True) # Lets font matching go straight to monospace faces
+
+        self._pending_highlight = set() # .py editors whose highlighter is created when their tab is first shown
         self.highlighters = {} # Store highlighters to prevent garbage collection {editor_widget: highlighter_instance}
+        self._path_to_widget = {} # _norm_path(file_path) -> editor widget, for O(1) "already open?" checks
+        # Keeps each editor's cached path_valid attribute current when files are deleted/replaced externally
+        self._file_watcher = QFileSystemWatcher(self)
+        self._file_watcher.fileChanged.connect(self._on_watched_file_changed)
+
+        # --- Background file loading ---
+        self._loader_signals = _FileLoaderSignals(self) # Lives on the GUI thread, so emits are queued here
+        self._loader_signals.loaded.connect(self._on_file_loaded)
+        self._loader_signals.failed.connect(self._on_file_load_failed)
+        self._pending_reloads = {} # path -> editor widget waiting for reloaded content
 
         # --- State for Editor Streaming ---
         self._is_editor_streaming = False
+        self._chunk_buffer: list[str] = [] # Chunks received since the last flush
+
+        # Coalesce chunk inserts into at most one document edit per frame (~60 fps)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(16)
+        self._flush_timer.timeout.connect(self._flush_chunks)
 
-    # ... request_open_files, open_files, mark_tab_modified, save_current_file, reload_current_file, close_tab ...
+    # ... request_open_files, open_files, save_current_file, reload_current_file, close_tab ...
     # (These methods remain largely the same, check diffs if needed)
     def request_open_files(self):
         """Shows a dialog to select files and opens them."""
@@ -72,100 +210,177 @@ class EditorPane(QWidget):
 
         file_paths, _ = QFileDialog.getOpenFileNames(
             self, "Open Files", start_dir,
-            "All Files (*);;Text Files (*.txt);;Python Files (*.py);;Markdown (*.md)"
+            "All Files (*);;Text Files (*.txt);;Python Files (*.py);;Markdown (*.md)",
+            # Skip per-directory icon lookups (slow on network/home dirs); we only read the files
+            options=QFileDialog.Option.DontUseCustomDirectoryIcons | QFileDialog.Option.ReadOnly
         )
         if file_paths: self.open_files(file_paths)
 
     def open_files(self, file_paths):
-        print(f"[DEBUG EditorPane open_files] Received request to open: {file_paths}")
-        opened_new = False; newly_opened_paths = []
-        for path in file_paths:
-            if not os.path.isfile(path):
-                self.status_message_requested.emit(f"Warning: '{os.path.basename(path)}' is not a valid file.")
-                continue
-            found_index = -1
-            for index in range(self.tab_widget.count()):
-                 widget = self.tab_widget.widget(index)
-                 if widget and widget.property("file_path") == path: found_index = index; break
-            if found_index != -1:
-                self.tab_widget.setCurrentIndex(found_index)
-                self.status_message_requested.emit(f"Switched to open tab: {os.path.basename(path)}")
-                continue
-            else:
-                opened_new = True
-                try:
-                    content = None; encoding_used = None
-                    for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                         try:
-                              with open(path, 'r', encoding=encoding) as f: content = f.read()
-                              encoding_used = encoding; break
-                         except UnicodeDecodeError: continue
-                         except Exception as inner_e: raise inner_e
-                    if content is None: raise ValueError(f"Could not decode file.")
-                except Exception as e:
-                    QMessageBox.critical(self, "Open Error", f"Could not open file:\n{path}\n\nError: {e}")
-                    self.status_message_requested.emit(f"Failed to open {os.path.basename(path)}: {e}")
+        logger.debug("open_files: received request to open %s", file_paths)
+        requested_paths = []; last_editor = None
+        # Add all tabs with a single tab-bar relayout and no currentChanged -> update_button_states per tab
+        self.tab_widget.setUpdatesEnabled(False)
+        self.tab_widget.blockSignals(True)
+        try:
+            for path in file_paths:
+                name = os.path.basename(path)
+                if not os.path.isfile(path):
+                    self.status_message_requested.emit(f"Warning: '{name}' is not a valid file.")
                     continue
-                editor = QTextEdit()
-                font = editor.font(); font.setFamily("Monospace"); font.setStyleHint(QFont.TypeWriter)
-                editor.setFont(font)
-                # Prevent textChanged signal during initial load
-                editor.blockSignals(True)
-                editor.setPlainText(content)
-                editor.blockSignals(False)
-
-                editor.setProperty("file_path", path)
-                editor.setProperty("is_modified", False)
-                editor.textChanged.connect(self.mark_tab_modified)
-                tab_title = os.path.basename(path)
-                index = self.tab_widget.addTab(editor, tab_title)
-                self.tab_widget.setTabToolTip(index, path)
-                self.tab_widget.setCurrentIndex(index)
-                if path.lower().endswith(".py"):
-                     highlighter = PythonHighlighter(editor.document())
-                     self.highlighters[editor] = highlighter
-                     print(f"[DEBUG EditorPane] Applied PythonHighlighter to {tab_title}")
-                newly_opened_paths.append(path)
-                self.status_message_requested.emit(f"Opened {os.path.basename(path)} (Encoding: {encoding_used})")
-
-        if opened_new: self.update_button_states()
-        # Return paths that were *actually* opened (for edit flow)
-        return newly_opened_paths
-
-    def mark_tab_modified(self):
-        """Marks the current tab as modified when text changes."""
-        current_widget = self.tab_widget.currentWidget()
-        if current_widget and isinstance(current_widget, QTextEdit):
-             # Prevent marking modified if we are currently streaming content into it
-             if self._is_editor_streaming:
-                 return
-             if not current_widget.property("is_modified"):
-                 current_index = self.tab_widget.currentIndex()
-                 current_text = self.tab_widget.tabText(current_index)
-                 if not current_text.startswith("*"):
-                      self.tab_widget.setTabText(current_index, "*" + current_text)
-                 current_widget.setProperty("is_modified", True)
-                 self.update_button_states() # Enable save/reload
+                widget = self._path_to_widget.get(_norm_path(path))
+                if widget is not None and self.tab_widget.indexOf(widget) != -1:
+                    last_editor = widget
+                    self.status_message_requested.emit(f"Switched to open tab: {name}")
+                    continue
+                # Show a placeholder tab right away; read + decode run on a pool thread (see _on_file_loaded)
+                last_editor = self._add_placeholder_tab(path, name)
+                QThreadPool.globalInstance().start(_FileLoader(path, self._loader_signals))
+                requested_paths.append(path)
+        finally:
+            self.tab_widget.blockSignals(False)
+            self.tab_widget.setUpdatesEnabled(True)
+        if last_editor is not None:
+            self.tab_widget.setCurrentIndex(self.tab_widget.indexOf(last_editor))
+            self._activate_pending_highlight(last_editor) # currentChanged may have been blocked
+        self.update_button_states()
+
+        # Return paths that are being opened (for edit flow)
+        return requested_paths
+
+    def _add_placeholder_tab(self, path, name):
+        """Adds a read-only "Loading…" editor tab for a file whose content is still being read."""
+        editor = CodeEdit()
+        # Font first: setting it after the text is in would lay the whole document out twice
+        editor.setFont(self._editor_font); editor.document().setDefaultFont(self._editor_font)
+        editor.document().setUndoRedoEnabled(False) # Loading the file is not an undoable edit
+        editor.setPlainText("Loading…")
+        editor.setReadOnly(True)
+        editor.loading = True; editor.awaiting_content = True
+        editor.file_path = path; editor.base_title = name
+        index = self.tab_widget.addTab(editor, editor.base_title)
+        self.tab_widget.setTabToolTip(index, path)
+        self._path_to_widget[_norm_path(path)] = editor
+        return editor
+
+    @Slot(str, str, str, object)
+    def _on_file_loaded(self, path, content, encoding_used, disk_state):
+        """Shows a file read by a _FileLoader, either in its placeholder tab or as the reload of an open one."""
+        if path in self._pending_reloads:
+            self._apply_reload(self._pending_reloads.pop(path), path, content, encoding_used, disk_state)
+            return
+        editor = self._path_to_widget.get(_norm_path(path))
+        if editor is None or not editor.awaiting_content: return # Closed (or filled) meanwhile
+        editor.awaiting_content = False
+        self._record_disk_state(editor, disk_state)
+        if len(content) > CHUNKED_LOAD_THRESHOLD: # Large file: fill the document slice by slice
+            editor.document().clear()
+            self.status_message_requested.emit(f"Loading {editor.base_title}...")
+            QTimer.singleShot(0, editor, lambda: self._insert_next_slices(editor, content, 0, encoding_used))
+            return
+        editor.setPlainText(content)
+        self._finish_load(editor, len(content), encoding_used)
+
+    def _insert_next_slices(self, editor, content, pos, encoding_used):
+        """Appends the next few slices of a large file, then yields to the event loop until it is all in."""
+        if self.tab_widget.indexOf(editor) == -1: return # Tab closed mid-load
+        doc = editor.document()
+        cursor = QTextCursor(doc); cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for _ in range(_LOAD_SLICES_PER_PASS):
+            end = pos + _LOAD_SLICE_CHARS
+            if content[end - 1:end] == "\r": end += 1 # Keep \r\n together (one line break in Qt)
+            cursor.insertText(content[pos:end])
+            pos = end
+            if pos >= len(content): break
+        cursor.endEditBlock()
+        doc.setModified(False) # Still just the file as read, not an edit
+        if pos < len(content):
+            QTimer.singleShot(0, editor, lambda: self._insert_next_slices(editor, content, pos, encoding_used))
+            return
+        self._finish_load(editor, len(content), encoding_used)
+
+    def _finish_load(self, editor, size, encoding_used):
+        """Makes a newly opened editor editable and wires it up once its document holds the whole file."""
+        path = editor.file_path
+        editor.document().setUndoRedoEnabled(True)
+        editor.setReadOnly(False); editor.loading = False
+        editor.path_valid = True # Just read it; the watcher reports later deletions
+        self._file_watcher.addPath(path)
+        # Fires only on clean <-> modified transitions (not on every keystroke)
+        editor.document().modificationChanged.connect(lambda modified, w=editor: self._on_modification_changed(w, modified))
+        if self._check_highlight_size(editor, path, size):
+             self._pending_highlight.add(editor) # Highlighted once the user actually looks at it
+        self.status_message_requested.emit(f"Opened {editor.base_title} (Encoding: {encoding_used})")
+        if editor is self.tab_widget.currentWidget():
+            self._activate_pending_highlight(editor); self.update_button_states()
+
+    @Slot(str, str)
+    def _on_file_load_failed(self, path, error):
+        if path in self._pending_reloads:
+            del self._pending_reloads[path]
+            QMessageBox.critical(self, "Reload Error", f"Could not reload file:\n{path}\n\nError: {error}")
+            self.status_message_requested.emit(f"Error reloading {os.path.basename(path)}: {error}")
+            return
+        editor = self._path_to_widget.pop(_norm_path(path), None)
+        if editor is not None and editor.awaiting_content: # Drop the placeholder tab
+            index = self.tab_widget.indexOf(editor)
+            if index != -1: self.tab_widget.removeTab(index)
+            editor.deleteLater()
+        QMessageBox.critical(self, "Open Error", f"Could not open file:\n{path}\n\nError: {error}")
+        self.status_message_requested.emit(f"Failed to open {os.path.basename(path)}: {error}")
+
+    def _on_current_tab_changed(self, index):
+        self._activate_pending_highlight(self.tab_widget.widget(index))
+        self.update_button_states()
+
+    def _activate_pending_highlight(self, editor):
+        """Schedules the highlighter for an editor whose tab is now visible, if it is still waiting for one."""
+        if editor not in self._pending_highlight: return
+        self._pending_highlight.discard(editor)
+        # Let the tab paint first; colors fill in on the next event loop pass
+        QTimer.singleShot(0, editor, lambda e=editor: self._attach_highlighter(e))
+
+    def _attach_highlighter(self, editor):
+        """Creates the PythonHighlighter for an editor, unless its tab was closed in the meantime."""
+        if self.tab_widget.indexOf(editor) == -1 or editor in self.highlighters: return
+        self.highlighters[editor] = PythonHighlighter(editor.document(), PythonHighlighter.get_shared_rules())
+        logger.debug("Applied PythonHighlighter to %s", editor.file_path)
+
+    def _check_highlight_size(self, editor, path, size):
+        """Returns True if the editor should get a PythonHighlighter; records large files as highlight_disabled."""
+        if not (path and path.lower().endswith(".py")): return False
+        disabled = size >= LARGE_FILE_THRESHOLD
+        if disabled and not editor.highlight_disabled:
+            self.status_message_requested.emit("Syntax highlighting disabled for large file")
+        editor.highlight_disabled = disabled
+        return not disabled
+
+    def _on_modification_changed(self, editor, modified):
+        """Adds/removes the '*' tab title prefix when an editor's document becomes modified or clean."""
+        index = self.tab_widget.indexOf(editor)
+        if index == -1: return
+        self.tab_widget.setTabText(index, "*" + editor.base_title if modified else editor.base_title)
+        if editor is self.tab_widget.currentWidget(): self.update_button_states() # Buttons only reflect the current tab
 
     def save_current_file(self):
         """Saves the content of the currently active tab to its file."""
         current_index = self.tab_widget.currentIndex()
         if current_index == -1: return
         widget = self.tab_widget.widget(current_index)
-        if widget and isinstance(widget, QTextEdit):
-            path = widget.property("file_path")
+        if widget and isinstance(widget, CodeEdit):
+            path = widget.file_path
             if path:
                 try:
                     content = widget.toPlainText()
-                    with open(path, 'w', encoding='utf-8') as f: f.write(content)
-                    self.status_message_requested.emit(f"File saved: {os.path.basename(path)}")
-                    widget.setProperty("is_modified", False)
-                    current_text = self.tab_widget.tabText(current_index)
-                    if current_text.startswith("*"): self.tab_widget.setTabText(current_index, current_text[1:])
-                    self.update_button_states()
+                    self._record_disk_state(widget, _write_file_atomic(path, content.encode('utf-8')))
+                    widget.path_valid = True
+                    self.status_message_requested.emit(f"File saved: {widget.base_title}")
+                    widget.document().setModified(False) # Title and buttons follow via modificationChanged
                 except Exception as e:
+                    widget.path_valid = os.path.isfile(path); self.update_button_states()
                     QMessageBox.critical(self, "Save Error", f"Could not save file:\n{path}\n\nError: {e}")
-                    self.status_message_requested.emit(f"Error saving {os.path.basename(path)}: {e}")
+                    self.status_message_requested.emit(f"Error saving {widget.base_title}: {e}")
             else:
                 self.status_message_requested.emit("Cannot save: File has no associated path (Save As not implemented).")
 
@@ -174,63 +389,101 @@ class EditorPane(QWidget):
          current_index = self.tab_widget.currentIndex()
          if current_index == -1: return
          widget = self.tab_widget.widget(current_index)
-         if widget and isinstance(widget, QTextEdit):
-             path = widget.property("file_path"); is_modified = widget.property("is_modified")
+         if widget and isinstance(widget, CodeEdit):
+             path = widget.file_path; is_modified = widget.document().isModified()
+             if widget.loading:
+                 self.status_message_requested.emit("Cannot reload: file is still loading."); return
              if path:
+                 if not is_modified and self._disk_state_unchanged(widget, path):
+                     self.status_message_requested.emit(f"{widget.base_title} is already up to date.")
+                     return
                  if is_modified:
                      reply = QMessageBox.question(self, 'Confirm Reload',
                                                   "Are you sure you want to reload the file?\nAll unsaved changes will be lost.",
                                                   QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
                      if reply == QMessageBox.No: return
-                 try:
-                    content = None; encoding_used = None
-                    for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                         try:
-                              with open(path, 'r', encoding=encoding) as f: content = f.read()
-                              encoding_used = encoding; break
-                         except UnicodeDecodeError: continue
-                         except Exception as inner_e: raise inner_e
-                    if content is None: raise ValueError("Could not decode file.")
-
-                    widget.blockSignals(True) # Block modify signal
-                    widget.setPlainText(content)
-                    widget.blockSignals(False) # Unblock modify signal
-
-                    widget.setProperty("is_modified", False)
-                    widget.setReadOnly(False)
-                    current_text = self.tab_widget.tabText(current_index)
-                    if current_text.startswith("*"): self.tab_widget.setTabText(current_index, current_text[1:])
-                    self.status_message_requested.emit(f"File reloaded: {os.path.basename(path)} (Encoding: {encoding_used})")
-                    self.update_button_states()
-
-                    # Reapply highlighter
-                    highlighter_instance = self.highlighters.get(widget)
-                    if highlighter_instance:
-                         print(f"[DEBUG EditorPane reload] Reapplying highlighter for {os.path.basename(path)}")
-                         highlighter_instance.setDocument(widget.document()); highlighter_instance.rehighlight()
-                    elif path.lower().endswith(".py"):
-                         print(f"[DEBUG EditorPane reload] Applying new highlighter for {os.path.basename(path)}")
-                         highlighter = PythonHighlighter(widget.document()); self.highlighters[widget] = highlighter
-                 except Exception as e:
-                     QMessageBox.critical(self, "Reload Error", f"Could not reload file:\n{path}\n\nError: {e}")
-                     self.status_message_requested.emit(f"Error reloading {os.path.basename(path)}: {e}")
+                 if path not in self._pending_reloads:
+                     QThreadPool.globalInstance().start(_FileLoader(path, self._loader_signals))
+                 self._pending_reloads[path] = widget # Finished in _apply_reload
              else: self.status_message_requested.emit("Cannot reload: No file path associated with this tab.")
 
+    def _record_disk_state(self, widget, disk_state):
+         """Remembers the file's mtime/size as last read or written, for the reload fast path."""
+         widget.disk_mtime, widget.disk_size = disk_state
+
+    def _disk_state_unchanged(self, widget, path):
+         """True if the file on disk still has the mtime/size recorded by _record_disk_state."""
+         try: st = os.stat(path)
+         except OSError: return False
+         return st.st_mtime_ns == widget.disk_mtime and st.st_size == widget.disk_size
+
+    @Slot(str)
+    def _on_watched_file_changed(self, path):
+         """Re-validates an open file's path after it changed, moved or was deleted on disk."""
+         widget = self._path_to_widget.get(_norm_path(path))
+         if widget is None: return
+         exists = os.path.isfile(path)
+         widget.path_valid = exists
+         # Replaced files (e.g. by an atomic save) drop out of the watcher; watch the new one
+         if exists and path not in self._file_watcher.files(): self._file_watcher.addPath(path)
+         if widget is self.tab_widget.currentWidget(): self.update_button_states()
+
+    def _apply_reload(self, widget, path, content, encoding_used, disk_state):
+         """Replaces an open tab's content with freshly read file content."""
+         current_index = self.tab_widget.indexOf(widget)
+         if current_index == -1: return # Tab was closed while the file was loading
+         doc = widget.document()
+         doc.setUndoRedoEnabled(False) # Drops the undo history along with the discarded edits
+         self._replace_changed_text(doc, content)
+         doc.setUndoRedoEnabled(True)
+
+         self._record_disk_state(widget, disk_state)
+         widget.path_valid = True
+         widget.document().setModified(False) # Title and buttons follow via modificationChanged
+         widget.setReadOnly(False)
+         self.status_message_requested.emit(f"File reloaded: {widget.base_title} (Encoding: {encoding_used})")
+         self.update_button_states()
+
+         # An attached highlighter already redid the changed blocks; drop it if the file grew too large
+         highlighter_instance = self.highlighters.get(widget)
+         if not self._check_highlight_size(widget, path, len(content)):
+              if highlighter_instance:
+                   highlighter_instance.setDocument(None); del self.highlighters[widget]
+         elif not highlighter_instance:
+              logger.debug("reload: applying new highlighter for %s", path)
+              QTimer.singleShot(0, widget, lambda e=widget: self._attach_highlighter(e))
+
+    def _replace_changed_text(self, doc, content):
+        """Turns doc's text into content by rewriting only the span that differs (the highlighter redoes just those blocks)."""
+        new = content.replace('\r\n', '\n').replace('\r', '\n') # Line breaks as Qt stores them
+        old = doc.toRawText() # Unlike toPlainText, keeps non-breaking spaces as they are
+        start, old_end, new_end = _changed_span(old, new.replace('\n', '\u2029')) # \u2029: Qt's block separator
+        if start == old_end and start == new_end: return # Unchanged on disk
+        cursor = QTextCursor(doc)
+        head = _utf16_len(old[:start])
+        cursor.setPosition(head)
+        cursor.setPosition(head + _utf16_len(old[start:old_end]), QTextCursor.KeepAnchor)
+        cursor.insertText(new[start:new_end])
+
     def close_tab(self, index):
         widget = self.tab_widget.widget(index)
-        if widget and isinstance(widget, QTextEdit):
-            if widget.property("is_modified"):
-                filename = self.tab_widget.tabText(index); filename = filename[1:] if filename.startswith("*") else filename
+        if widget and isinstance(widget, CodeEdit):
+            if widget.document().isModified():
+                filename = widget.base_title
                 reply = QMessageBox.question(self, 'Unsaved Changes',
                                              f"'{filename}' has unsaved changes.\nDo you want to save before closing?",
                                              QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel, QMessageBox.Cancel)
                 if reply == QMessageBox.Save:
                     self.save_current_file()
-                    if widget.property("is_modified"): return # Save failed
+                    if widget.document().isModified(): return # Save failed
                 elif reply == QMessageBox.Cancel: return
+            self._pending_highlight.discard(widget)
             if widget in self.highlighters:
-                print(f"[DEBUG EditorPane close_tab] Removing highlighter for {self.tab_widget.tabText(index)}")
+                logger.debug("close_tab: removing highlighter for %s", widget.file_path)
                 del self.highlighters[widget]
+            if widget.file_path:
+                self._path_to_widget.pop(_norm_path(widget.file_path), None)
+                self._file_watcher.removePath(widget.file_path)
             self.tab_widget.removeTab(index); widget.deleteLater()
         else:
              self.tab_widget.removeTab(index);
@@ -240,14 +493,15 @@ class EditorPane(QWidget):
 
     def get_current_content(self):
         current_widget = self.tab_widget.currentWidget()
-        if current_widget and isinstance(current_widget, QTextEdit):
+        if current_widget and isinstance(current_widget, CodeEdit):
+            if current_widget.loading: return None # Placeholder / partial content
             return current_widget.toPlainText()
         return None
 
     def get_current_path(self):
         current_widget = self.tab_widget.currentWidget()
-        if current_widget and isinstance(current_widget, QTextEdit):
-            return current_widget.property("file_path")
+        if current_widget and isinstance(current_widget, CodeEdit):
+            return current_widget.file_path
         return None
 
     # --- REMOVED set_current_content (replaced by streaming slots) ---
@@ -257,12 +511,14 @@ class EditorPane(QWidget):
         """Enable/disable Save and Reload buttons based on current tab state."""
         current_widget = self.tab_widget.currentWidget()
         has_valid_path = False; is_modified = False; has_tab = current_widget is not None
-        if has_tab and isinstance(current_widget, QTextEdit):
-            path = current_widget.property("file_path")
-            if path and os.path.isfile(path): has_valid_path = True
-            is_modified = current_widget.property("is_modified")
-        can_save = has_tab and is_modified and current_widget.property("file_path") is not None
+        if has_tab and isinstance(current_widget, CodeEdit):
+            path = current_widget.file_path
+            if path and current_widget.path_valid: has_valid_path = True # Cached; no stat() per tab switch
+            is_modified = current_widget.document().isModified()
+        can_save = has_tab and is_modified and current_widget.file_path is not None
         can_reload = has_tab and has_valid_path
+        if (can_save, can_reload) == self._button_states: return # Unchanged: skip the setEnabled calls
+        self._button_states = (can_save, can_reload)
         self.save_button.setEnabled(can_save)
         self.reload_button.setEnabled(can_reload)
 
@@ -274,20 +530,21 @@ class EditorPane(QWidget):
         if context_type != 'editor': return # Only handle editor streams
 
         current_widget = self.tab_widget.currentWidget()
-        if current_widget and isinstance(current_widget, QTextEdit):
+        if current_widget and isinstance(current_widget, CodeEdit):
              if self._is_editor_streaming:
-                 print("[EditorPane WARN] New editor stream started while previous was active.")
+                 logger.warning("New editor stream started while previous was active.")
                  # Decide how to handle: replace content anyway or show error? Replace for now.
-             print(f"[EditorPane] Stream started for editor (sender: {sender})")
+             logger.info("Stream started for editor (sender: %s)", sender)
              self._is_editor_streaming = True
-             # Clear existing content and block signals temporarily
-             current_widget.blockSignals(True)
-             current_widget.setPlainText("") # Clear content for replacement
-             current_widget.blockSignals(False)
+             self._chunk_buffer.clear()
+             # Clear existing content for replacement; the buffer counts as modified again once chunks arrive
+             current_widget.document().setPlainText("")
+             current_widget.document().setModified(False)
+             current_widget.document().setUndoRedoEnabled(False) # No undo entry per streamed insert
              self.status_message_requested.emit("Receiving suggested edit from Gemini...")
              current_widget.setFocus() # Ensure editor has focus
         else:
-             print("[EditorPane ERROR] Editor stream started but no active editor tab found.")
+             logger.error("Editor stream started but no active editor tab found.")
              # Optionally emit status message
              self.status_message_requested.emit("Error: Cannot apply edit - no active editor tab.")
              # Need to signal back to controller? Maybe not, let it time out or error?
@@ -296,16 +553,29 @@ class EditorPane(QWidget):
     def handle_stream_chunk(self, chunk):
         """Appends a text chunk to the current editor during streaming."""
         if not self._is_editor_streaming: return # Not in editor streaming state
+        # Buffer the chunk; it is inserted together with its neighbours on the next flush
+        self._chunk_buffer.append(chunk)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_chunks(self):
+        """Inserts all buffered stream chunks into the current editor with one insertText call."""
+        self._flush_timer.stop()
+        if not self._chunk_buffer: return
+        chunk = "".join(self._chunk_buffer)
+        self._chunk_buffer.clear()
 
         current_widget = self.tab_widget.currentWidget()
-        if current_widget and isinstance(current_widget, QTextEdit):
+        if current_widget and isinstance(current_widget, CodeEdit):
              # Append text chunk
-             current_widget.blockSignals(True) # Block modify signal during insertion
-             cursor = current_widget.textCursor()
-             cursor.movePosition(QTextCursor.End)
-             cursor.insertText(chunk)
-             current_widget.ensureCursorVisible()
-             current_widget.blockSignals(False) # Unblock modify signal
+             sb = current_widget.verticalScrollBar()
+             scroll_pos = sb.value()
+             at_bottom = scroll_pos >= sb.maximum() - 4 # Don't yank the view if the user scrolled up
+             # Widget-level append, no Python-side cursor objects
+             current_widget.moveCursor(QTextCursor.End)
+             current_widget.insertPlainText(chunk)
+             # moveCursor() scrolls to the caret; put the view back unless we were following the end
+             sb.setValue(sb.maximum() if at_bottom else scroll_pos)
         # else: error already logged in handle_stream_started if no widget
 
     @Slot(str, str)
@@ -313,39 +583,38 @@ class EditorPane(QWidget):
         """Finalizes the editor state after streaming is complete."""
         if context_type != 'editor' or not self._is_editor_streaming: return
 
-        print(f"[EditorPane] Stream finished for editor (sender: {sender})")
+        logger.info("Stream finished for editor (sender: %s)", sender)
+        self._flush_chunks() # Drain whatever is still buffered
         self._is_editor_streaming = False
         current_widget = self.tab_widget.currentWidget()
-        if current_widget and isinstance(current_widget, QTextEdit):
-            # Manually mark as modified *after* streaming finishes
-            if not current_widget.property("is_modified"):
-                current_index = self.tab_widget.currentIndex()
-                current_text = self.tab_widget.tabText(current_index)
-                if not current_text.startswith("*"):
-                    self.tab_widget.setTabText(current_index, "*" + current_text)
-                current_widget.setProperty("is_modified", True)
-
-            # Re-apply/re-highlight after content change
+        if current_widget and isinstance(current_widget, CodeEdit):
+            current_widget.document().setUndoRedoEnabled(True)
+            # The AI edit replaced the buffer, so it differs from disk even if no chunk arrived
+            current_widget.document().setModified(True)
+
+            # An attached highlighter already did the streamed blocks as they were inserted
             highlighter_instance = self.highlighters.get(current_widget)
-            if highlighter_instance:
-                 print(f"[DEBUG EditorPane stream finished] Rehighlighting after AI edit")
-                 highlighter_instance.rehighlight() # Force full rehighlight
-            elif current_widget.property("file_path") and current_widget.property("file_path").lower().endswith(".py"):
-                 print(f"[DEBUG EditorPane stream finished] Applying new highlighter after AI edit")
-                 highlighter = PythonHighlighter(current_widget.document())
+            if not self._check_highlight_size(current_widget, current_widget.file_path,
+                                              current_widget.document().characterCount()):
+                 if highlighter_instance:
+                      highlighter_instance.setDocument(None); del self.highlighters[current_widget]
+            elif not highlighter_instance:
+                 logger.debug("stream finished: applying new highlighter after AI edit")
+                 highlighter = PythonHighlighter(current_widget.document(), PythonHighlighter.get_shared_rules())
                  self.highlighters[current_widget] = highlighter
 
             self.update_button_states() # Ensure save is enabled
             self.status_message_requested.emit("Editor content updated by Gemini.")
         else:
-             print("[EditorPane WARN] Editor stream finished, but no active editor tab found.")
+             logger.warning("Editor stream finished, but no active editor tab found.")
 
     @Slot(str, str)
     def handle_stream_error(self, error_message, context_type):
         """Handles errors during editor streaming."""
         if context_type != 'editor': return
 
-        print(f"[EditorPane] Stream error for editor: {error_message}")
+        logger.info("Stream error for editor: %s", error_message)
+        self._flush_chunks() # Keep the partial result that arrived before the error
         # Display error in status bar and maybe a message box?
         self.status_message_requested.emit(f"Error during edit: {error_message}")
         QMessageBox.warning(self, "Edit Error", f"Could not apply edit:\n{error_message}")
@@ -355,15 +624,11 @@ class EditorPane(QWidget):
         # Should we revert changes? Maybe not, leave partial result for user to decide.
         # Manually mark modified if any content was added before error?
         current_widget = self.tab_widget.currentWidget()
-        if current_widget and isinstance(current_widget, QTextEdit) and current_widget.toPlainText():
-            if not current_widget.property("is_modified"):
+        if current_widget and isinstance(current_widget, CodeEdit):
+            current_widget.document().setUndoRedoEnabled(True)
+            if current_widget.toPlainText():
                 # Mark modified if error happened mid-stream after adding content
-                current_index = self.tab_widget.currentIndex()
-                current_text = self.tab_widget.tabText(current_index)
-                if not current_text.startswith("*"):
-                    self.tab_widget.setTabText(current_index, "*" + current_text)
-                current_widget.setProperty("is_modified", True)
-                self.update_button_states()
+                current_widget.document().setModified(True)
 
 
 # --- END OF FILE editor_pane.py ---
\ No newline at end of file
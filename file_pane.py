@@ -1,11 +1,16 @@
 # --- START OF FILE file_pane.py ---
 
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTreeView, QFileSystemModel,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTreeView, QFileSystemModel, QFileIconProvider,
                                QMenu, QAbstractItemView, QPushButton, QStyle, QLabel)
-from PySide6.QtCore import Signal, QDir, Qt, QPoint, QModelIndex, Slot # Added Slot, QModelIndex
+from PySide6.QtCore import Signal, QDir, Qt, QPoint, QModelIndex, Slot, QElapsedTimer # Added Slot, QModelIndex
 from PySide6.QtGui import QIcon
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+REFRESH_MIN_INTERVAL_MS = 250 # Refresh requests closer together than this are dropped
+
 class FilePane(QWidget):
     open_files_requested = Signal(list)      # list of file paths
     explain_files_requested = Signal(list)   # list of file paths
@@ -17,12 +22,23 @@ class FilePane(QWidget):
 
         # Start in Home Directory
         initial_path = QDir.homePath()
-        print(f"[DEBUG FilePane __init__] Target initial path (Home): {initial_path}") # DEBUG
+        self._fs_root = QDir.rootPath() # '/' on Linux; compared against on every navigation
+        logger.debug("Target initial path (Home): %s", initial_path)
 
         self.model = QFileSystemModel()
-        # Set model root to the absolute filesystem root ('/' on Linux)
-        self.model.setRootPath(QDir.rootPath())
-        print(f"[DEBUG FilePane __init__] Model root path set to: {self.model.rootPath()}") # DEBUG
+        # Generic folder icons: don't probe each directory for a custom icon (slow on network mounts)
+        self._icon_provider = QFileIconProvider() # The model doesn't take ownership; keep it alive
+        self._icon_provider.setOptions(QFileIconProvider.DontUseCustomDirectoryIcons)
+        self.model.setIconProvider(self._icon_provider)
+        self.model.setOption(QFileSystemModel.DontUseCustomDirectoryIcons, True)
+        # Browse-only pane: no rename/drag-drop bookkeeping, and no readlink/realpath per symlink entry
+        self.model.setReadOnly(True)
+        self.model.setResolveSymlinks(False)
+        # No inotify watches on every visited directory; "Refresh View" re-reads on demand
+        self.model.setOption(QFileSystemModel.DontWatchForChanges, True)
+        # Gather/watch only the directory actually shown; go_up_directory moves the root upward as needed
+        # (rooting the model at '/' had it watching and stat'ing from the filesystem root)
+        self.model.setRootPath(initial_path)
 
         # Up Button
         self.up_button = QPushButton("  Up")
@@ -34,189 +50,153 @@ class FilePane(QWidget):
             up_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_FileDialogToParent)
             if not up_icon.isNull():
                  self.up_button.setIcon(up_icon)
-                 print("[DEBUG FilePane __init__] Successfully loaded Up button icon.") # DEBUG
             else:
-                 print("[DEBUG FilePane __init__] WARNING: Could not load standard Up button icon.") # DEBUG
+                 logger.warning("Could not load standard Up button icon.")
         except Exception as e:
-             print(f"[DEBUG FilePane __init__] ERROR loading icon: {e}") # DEBUG
+             logger.warning("Error loading Up button icon: %s", e)
 
         self.up_button.setToolTip("Go to Parent Directory")
         self.up_button.clicked.connect(self.go_up_directory)
         layout.addWidget(self.up_button)
-        print("[DEBUG FilePane __init__] Up button created, styled, and added to layout.") # DEBUG
 
         # Tree View
         self.tree = QTreeView()
         self.tree.setModel(self.model)
+        self.tree.setUniformRowHeights(True) # All rows share font/icon height: no per-row size hints on paint/scroll
 
         initial_view_index = self.model.index(initial_path)
         if initial_view_index.isValid():
-            print(f"[DEBUG FilePane __init__] Setting initial TREE view root index to: {self.model.filePath(initial_view_index)}") # DEBUG
-            self.tree.setRootIndex(initial_view_index)
+            self._set_view_root(initial_view_index)
         else:
             fallback_index = self.model.index(self.model.rootPath())
-            print(f"[DEBUG FilePane __init__] Home path invalid for model? Falling back TREE view root index to: {self.model.filePath(fallback_index)}") # DEBUG
-            self.tree.setRootIndex(fallback_index)
+            logger.debug("Home path invalid for model, falling back to the model root")
+            self._set_view_root(fallback_index)
 
         self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
+        self._build_context_menu()
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
         self.tree.doubleClicked.connect(self.handle_double_click) # <<< CONNECTED doubleClicked SIGNAL >>>
-        self.tree.setAnimated(True)
+        self.tree.setAnimated(False) # Instant expand/collapse: no extra animation frames to paint
         self.tree.setIndentation(15)
-        self.tree.setSortingEnabled(True)
-        self.tree.sortByColumn(0, Qt.AscendingOrder)
+        self.tree.sortByColumn(0, Qt.AscendingOrder) # Sort by name once; the model keeps new entries in that order
+        self.tree.setSortingEnabled(False) # No header click-to-resort
 
         layout.addWidget(self.tree)
-
-        # Update button state initially
-        self._update_up_button_state()
-        print("[DEBUG FilePane __init__] Initial button state updated.") # DEBUG
+        self._last_refresh = QElapsedTimer() # Invalid until the first refresh
 
     # <<< METHOD ADDED IN PREVIOUS STEP >>>
     def get_current_view_path(self) -> str:
         """Returns the absolute path of the directory currently shown in the tree view."""
-        current_root_index: QModelIndex = self.tree.rootIndex()
-        if current_root_index.isValid():
-            path = self.model.filePath(current_root_index)
-            print(f"[DEBUG FilePane get_current_view_path] Returning path: {path}") # DEBUG
-            return path
-        else:
-            # Fallback
-            path = QDir.currentPath()
-            print(f"[DEBUG FilePane get_current_view_path] Root index invalid, returning fallback: {path}") # DEBUG
-            return path
+        return self._current_view_path # Kept current by _set_view_root
 
     def go_up_directory(self):
         """Navigates the tree view to the parent directory."""
-        print("[DEBUG FilePane go_up_directory] 'Up' button clicked!") # DEBUG
-        current_view_root_index: QModelIndex = self.tree.rootIndex()
-        current_view_path = self.model.filePath(current_view_root_index)
-        print(f"[DEBUG FilePane go_up_directory] Current TREE view root index path: {current_view_path}") # DEBUG
-
-        parent_index: QModelIndex = current_view_root_index.parent()
-        is_parent_valid = parent_index.isValid()
-        parent_path = self.model.filePath(parent_index) if is_parent_valid else "N/A"
-        print(f"[DEBUG FilePane go_up_directory] Parent index in MODEL valid? {is_parent_valid}, Path: {parent_path}") # DEBUG
-
-        is_already_at_root = (current_view_path == QDir.rootPath()) or \
-                             (current_view_path == self.model.rootPath())
-        print(f"[DEBUG FilePane go_up_directory] Current view path is root ('/')? {is_already_at_root}") # DEBUG
-
-        if is_parent_valid:
-            print(f"[DEBUG FilePane go_up_directory] Setting TREE view root index to parent: {parent_path}") # DEBUG
-            self.tree.setRootIndex(parent_index)
-            print(f"[DEBUG FilePane go_up_directory] Tree view root index set. Updating button state...") # DEBUG
-            self._update_up_button_state()
+        parent_index: QModelIndex = self.tree.rootIndex().parent()
+        if not parent_index.isValid(): return # Already at the filesystem root (Up is disabled there too)
+        parent_path = self.model.filePath(parent_index)
+        logger.debug("go_up_directory: %s -> %s", self._current_view_path, parent_path)
+        if self._current_view_path == self.model.rootPath(): # Leaving the gathered subtree
+            self.model.setRootPath(parent_path)
+            parent_index = self.model.index(parent_path)
+        self._set_view_root(parent_index)
+
+    def _set_view_root(self, index: QModelIndex):
+        """Shows the directory at index in the tree; all navigation goes through here so the Up button follows."""
+        if index.isValid():
+            self._current_view_path = self.model.filePath(index)
         else:
-            print(f"[DEBUG FilePane go_up_directory] Cannot go up. Parent index is invalid (already at model root?).") # DEBUG
+            self._current_view_path = QDir.currentPath() # Fallback
+            logger.debug("_set_view_root: invalid root index, falling back to %s", self._current_view_path)
+        self.tree.setRootIndex(index)
+        self._update_up_button_state()
 
     def _update_up_button_state(self):
         """Disables the 'Up' button if the view is at the filesystem root ('/')."""
-        print("[DEBUG FilePane _update_up_button_state] Updating button state...") # DEBUG
-        current_view_root_index: QModelIndex = self.tree.rootIndex()
-        current_view_path = self.model.filePath(current_view_root_index)
-        print(f"[DEBUG FilePane _update_up_button_state] Current TREE view path: {current_view_path}") # DEBUG
-
-        can_go_up = (current_view_path != QDir.rootPath()) and \
-                    (current_view_path != self.model.rootPath())
-
-        print(f"[DEBUG FilePane _update_up_button_state] Calculated can_go_up (view path != '/'): {can_go_up}") # DEBUG
-        self.up_button.setEnabled(can_go_up)
-        print(f"[DEBUG FilePane _update_up_button_state] Button enabled: {can_go_up}") # DEBUG
+        self.up_button.setEnabled(self._current_view_path != self._fs_root) # The model root only marks what is watched, not a limit
 
     def get_selected_paths(self):
-        selected_indexes = self.tree.selectionModel().selectedIndexes()
-        paths = set()
-        for index in selected_indexes:
-            model_index = index
-            if model_index.column() == 0:
-                 file_path = self.model.filePath(model_index)
-                 # Ensure it's actually a file, not a directory getting selected somehow
-                 if self.model.fileInfo(model_index).isFile():
-                     paths.add(file_path)
-        return list(paths)
+        # selectedRows(0) yields one index per row, in selection order: no dedupe needed
+        # isDir() answers from the model's cached node; only the remaining rows pay for a stat
+        paths = (self.model.filePath(index) for index in self.tree.selectionModel().selectedRows(0)
+                 if not self.model.isDir(index)) # Directories can be selected too; only files are acted on
+        return [path for path in paths if os.path.isfile(path)] # Regular files only: no broken links, FIFOs or devices
+
+    def _build_context_menu(self):
+        """Creates the tree's context menu once; show_context_menu only updates texts and visibility."""
+        self._context_menu = QMenu(self)
+        self._menu_paths = [] # Files the open/edit/explain actions apply to (set when the menu is shown)
+        self._open_action = self._context_menu.addAction("")
+        self._open_action.triggered.connect(lambda: self.open_files_requested.emit(self._menu_paths))
+        self._edit_action = self._context_menu.addAction("")
+        self._edit_action.triggered.connect(lambda: self.edit_files_requested.emit(self._menu_paths))
+        self._explain_action = self._context_menu.addAction("")
+        self._explain_action.triggered.connect(lambda: self.explain_files_requested.emit(self._menu_paths))
+        self._files_separator = self._context_menu.addSeparator()
+        # General actions
+        self._refresh_action = self._context_menu.addAction("Refresh View")
+        self._refresh_action.triggered.connect(self.refresh)
+        # Optional: Set directory as root view on right-click
+        # self._set_root_action = self._context_menu.addAction("Set as Root View")
 
     def show_context_menu(self, pos: QPoint):
-        index_at_pos = self.tree.indexAt(pos)
         selected_paths = self.get_selected_paths() # Get selected FILES
-        menu = QMenu()
+        self._menu_paths = selected_paths
 
         # Actions for selected files
         if selected_paths:
-            # Use f-string for clarity if opening multiple or single
             num_files = len(selected_paths)
-            open_text = f"Open {num_files} File{'s' if num_files > 1 else ''} in Editor"
-            edit_text = f"Edit {num_files} File{'s' if num_files > 1 else ''} with Gemini"
-            explain_text = f"Explain {num_files} File{'s' if num_files > 1 else ''} with Gemini"
-
-            open_action = menu.addAction(open_text)
-            edit_action = menu.addAction(edit_text)
-            explain_action = menu.addAction(explain_text)
-            menu.addSeparator()
-        else:
-            open_action = None
-            edit_action = None
-            explain_action = None
-
-        # General actions
-        refresh_action = menu.addAction("Refresh View")
-
-        # Optional: Set directory as root view on right-click
-        # if index_at_pos.isValid() and self.model.isDir(index_at_pos):
-        #    set_root_action = menu.addAction("Set as Root View")
-
-        action = menu.exec(self.tree.mapToGlobal(pos))
-
-        # Handle actions
-        if action == open_action and selected_paths:
-            print("[DEBUG FilePane show_context_menu] 'Open' action triggered.") # DEBUG
-            self.open_files_requested.emit(selected_paths)
-        elif action == edit_action and selected_paths:
-            print("[DEBUG FilePane show_context_menu] 'Edit' action triggered.") # DEBUG
-            self.edit_files_requested.emit(selected_paths)
-        elif action == explain_action and selected_paths:
-            print("[DEBUG FilePane show_context_menu] 'Explain' action triggered.") # DEBUG
-            self.explain_files_requested.emit(selected_paths)
-        elif action == refresh_action:
-            self.refresh()
-        # elif action == set_root_action:
-        #     if index_at_pos.isValid() and self.model.isDir(index_at_pos):
-        #         self.tree.setRootIndex(index_at_pos)
-        #         self._update_up_button_state()
+            files = f"{num_files} File{'s' if num_files > 1 else ''}"
+            self._open_action.setText(f"Open {files} in Editor")
+            self._edit_action.setText(f"Edit {files} with Gemini")
+            self._explain_action.setText(f"Explain {files} with Gemini")
+        for action in (self._open_action, self._edit_action, self._explain_action, self._files_separator):
+            action.setVisible(bool(selected_paths))
+
+        self._context_menu.exec(self.tree.mapToGlobal(pos)) # Chosen action runs via its triggered signal
+
+    def _loaded_dirs(self, parent: QModelIndex):
+        """Paths of the directories under parent whose contents the model has listed, parents before children."""
+        paths = []
+        for row in range(self.model.rowCount(parent)):
+            index = self.model.index(row, 0, parent)
+            # canFetchMore() is False once listed; never-opened directories are read fresh when first expanded
+            if self.model.isDir(index) and not self.model.canFetchMore(index):
+                paths.append(self.model.filePath(index))
+                paths.extend(self._loaded_dirs(index))
+        return paths
 
     def refresh(self):
-        current_root = self.tree.rootIndex()
-        current_path = self.model.filePath(current_root)
-        print(f"[DEBUG FilePane refresh] Refreshing view at: {current_path}") # DEBUG
-        self.model.refresh(current_root)
-        # Refresh parent as well in case of directory changes affecting the view
-        parent_root = current_root.parent()
-        if parent_root.isValid():
-            self.model.refresh(parent_root)
-        print(f"[DEBUG FilePane refresh] Refresh complete for: {current_path}") # DEBUG
-        self._update_up_button_state()
+        """Re-reads the root directory and every directory listed under it (repeated requests are throttled)."""
+        if self._last_refresh.isValid() and not self._last_refresh.hasExpired(REFRESH_MIN_INTERVAL_MS): return
+        self._last_refresh.start()
+        logger.debug("Refreshing view at %s", self._current_view_path)
+        # QFileSystemModel has no refresh(); setting a root path makes it re-gather that directory. Without
+        # change watching nothing else updates the tree, so each listed directory takes a turn as root too
+        # (expanded or not: a collapsed one is not re-listed when it is expanded again).
+        root_path = self.model.rootPath()
+        self.tree.setUpdatesEnabled(False) # One repaint for the reset, not one per step
+        try:
+            self.model.setRootPath("")
+            for path in self._loaded_dirs(self.tree.rootIndex()): self.model.setRootPath(path)
+            self.model.setRootPath(root_path) # The view's root index stays valid; Up button state is unchanged
+        finally:
+            self.tree.setUpdatesEnabled(True)
 
     # <<< ADDED METHOD: handle_double_click >>>
     @Slot(QModelIndex)
     def handle_double_click(self, index: QModelIndex):
         """Handles double-clicking on an item in the tree view."""
         if not index.isValid():
-            print("[DEBUG FilePane handle_double_click] Invalid index clicked.") # DEBUG
             return # Ignore invalid index clicks
 
         file_info = self.model.fileInfo(index)
         if file_info.isFile():
-            file_path = self.model.filePath(index)
-            print(f"[DEBUG FilePane handle_double_click] File double-clicked: {file_path}") # DEBUG
-            # Emit the same signal used by the context menu
-            self.open_files_requested.emit([file_path])
+            # Emit the same signal used by the context menu (path from the same QFileInfo, no second model call)
+            self.open_files_requested.emit([file_info.absoluteFilePath()])
         elif file_info.isDir():
-             print(f"[DEBUG FilePane handle_double_click] Directory double-clicked: {self.model.filePath(index)}") # DEBUG
+             pass # Directories expand in place
              # Optional: Navigate into directory on double-click
-             # self.tree.setRootIndex(index)
-             # self._update_up_button_state()
-        else:
-             print(f"[DEBUG FilePane handle_double_click] Double-clicked non-file/dir item.") # DEBUG
+             # self._set_view_root(index)
 
 # --- END OF FILE file_pane.py ---
\ No newline at end of file
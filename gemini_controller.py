@@ -1,107 +1,326 @@
 # --- START OF FILE gemini_controller.py ---
 
-from PySide6.QtCore import QObject, Signal, Slot, QThread, QSettings # Added QSettings
+from PySide6.QtCore import QObject, Signal, Slot, QSettings, QTimer, QRunnable, QThreadPool # Added QSettings
+from collections import OrderedDict, deque
+import codecs
+import datetime
+import functools
+import hashlib
+import json
+import logging
 import os
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
+import re
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import typing
+from prompt_cache import PromptCache, SemanticCache, prompt_key
+from text_encoding import decode_text
 
 # Forward declaration hint for type hinting
 if typing.TYPE_CHECKING:
     from file_pane import FilePane
     from editor_pane import EditorPane
 
+logger = logging.getLogger(__name__)
+
+API_MAX_THREADS = 4 # Concurrent Gemini requests (a cancelled stream keeps its thread until its next chunk)
+CACHE_REPLAY_INTERVAL_MS = 20 # Pace of replayed cached chunks (keeps the streaming look)
+CHUNK_COALESCE_S = 0.016 # The worker emits received text at most about once per frame...
+CHUNK_COALESCE_MAX_CHARS = 512 # ...or as soon as this much is waiting
+# Server-side context caches: the API rejects content below a per-model token minimum, so smaller prompts are sent whole
+_CONTEXT_CACHE_MIN_TOKENS = (("gemini-2.5-pro", 4096), ("gemini-2.5-flash", 1024)) # By model name prefix
+_CONTEXT_CACHE_DEFAULT_MIN_TOKENS = 32768 # gemini-1.5-* and anything not listed
+_CHARS_PER_TOKEN = 4 # Rough estimate, only used to skip cache attempts that can't succeed
+CONTEXT_CACHE_TTL_S = 600
+CONTEXT_PREFIXES_REMEMBERED = 32 # A cache is only created for a prefix seen before (a billed resource)
+_READ_WORKERS = 8 # Parallel file reads in _read_files
+PROMPT_MAX_FILE_CHARS = 20000 # Largest per-file truncation used in prompts; nothing past it is read
+# Model list from list_models(), reused for a while instead of a network round-trip per refresh
+MODELS_CACHE_FILE = Path.home() / ".cache" / "gemnet" / "models.json"
+MODELS_CACHE_TTL_S = 300
+
+_FILENAME_RE = re.compile(r'[^\w.\- ]') # Characters dropped from /create filenames (\w keeps letters, digits, _)
+
+# Message prefix per google.api_core exception class name, for errors raised by a streaming request
+_API_ERROR_MESSAGES = {
+    "PermissionDenied": "API Permission Denied",
+    "ResourceExhausted": "API Quota Exceeded",
+    "InvalidArgument": "API Invalid Argument",
+    "NotFound": "API Not Found",
+    "FailedPrecondition": "API Precondition Failed (Billing?)",
+    "InternalServerError": "API Internal Server Error",
+    "ServiceUnavailable": "API Service Unavailable",
+}
+# Hints for known InvalidArgument causes (matched in the server's text); the server's text is always appended
+_INVALID_ARGUMENT_HINTS = (
+    ("User location is not supported", "API Error: Location not supported."),
+    ("API key not valid", "API Error: API key not valid."),
+    ("found no valid candidate", "API Error: No valid candidate found (Safety/Prompt issue?)."),
+)
+
+_genai = None # google.generativeai, imported by _get_genai()
+
+# Same for every request, so built once
+_SAFETY_SETTINGS = [{"category": c, "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
+                    for c in ("HARM_CATEGORY_HARASSMENT", "HARM_CATEGORY_HATE_SPEECH", "HARM_CATEGORY_SEXUALLY_EXPLICIT", "HARM_CATEGORY_DANGEROUS_CONTENT")]
+
+
+def _truncated(text, limit):
+    """Returns text cut to limit characters, with a marker line if anything was cut."""
+    return text[:limit] + ("\n[... content truncated ...]\n" if len(text) > limit else "")
+
+
+def _get_genai():
+    """Imports google.generativeai on first use; it pulls in gRPC and protobuf, which is slow at startup."""
+    global _genai
+    if _genai is None:
+        import google.generativeai as _g
+        _genai = _g
+    return _genai
+
+
+def _context_cache_min_chars(model_name):
+    """Estimated prompt length below which model_name can't hold an explicit context cache."""
+    tokens = next((t for prefix, t in _CONTEXT_CACHE_MIN_TOKENS if model_name.startswith(prefix)), _CONTEXT_CACHE_DEFAULT_MIN_TOKENS)
+    return tokens * _CHARS_PER_TOKEN
+
+
+def _caching_unsupported(e):
+    """True if a failed cache creation means caching won't work for this model at all (not just this time)."""
+    if isinstance(e, (AttributeError, NotImplementedError)): return True # SDK without caching support
+    return type(e).__name__ == "InvalidArgument" or "not supported" in str(e).lower()
+
+
+def _api_key_hash(api_key):
+    """Identifies an API key in the models cache without storing the key itself."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_cached_models(key_hash):
+    """Returns the cached model list for key_hash, or None if missing, stale or for another key."""
+    try:
+        if time.time() - MODELS_CACHE_FILE.stat().st_mtime >= MODELS_CACHE_TTL_S: return None
+        data = json.loads(MODELS_CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError): return None
+    if not isinstance(data, dict) or data.get("key") != key_hash or not isinstance(data.get("models"), list): return None
+    return [str(m) for m in data["models"]]
+
+
+def _store_cached_models(key_hash, models):
+    """Writes the model list to the cache file (best-effort)."""
+    try:
+        MODELS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = MODELS_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"key": key_hash, "models": models}), encoding="utf-8")
+        os.replace(tmp, MODELS_CACHE_FILE)
+    except OSError as e:
+        logger.warning("Could not write %s: %s", MODELS_CACHE_FILE, e)
+
+
+def _api_error_message(e):
+    """Returns the user-facing message for an exception raised by a streaming request."""
+    if type(e).__name__ == "InvalidArgument":
+        hint = next((hint for needle, hint in _INVALID_ARGUMENT_HINTS if needle in str(e)), None)
+        if hint is not None: return f"{hint} {e}"
+    # google_exceptions classes are matched by name along the MRO, so subclasses get their base's message
+    prefix = next((_API_ERROR_MESSAGES[c.__name__] for c in type(e).__mro__
+                   if c.__module__ == "google.api_core.exceptions" and c.__name__ in _API_ERROR_MESSAGES), None)
+    if prefix is None: return f"Worker Thread Error: {type(e).__name__} - {e}"
+    return f"{prefix}: {e}"
+
+
+def _read_text_file(path, max_chars=PROMPT_MAX_FILE_CHARS):
+    """Reads the start of a file with a single binary read: UTF-8 if it decodes, else the same encoding guess the
+    editor makes when opening the file (text_encoding.decode_text), whatever the file's size.
+    Reads just enough bytes that a longer file still decodes to more than max_chars, so truncation is detected."""
+    with open(path, 'rb') as f: raw = f.read((max_chars + 1) * 4) # Room for max_chars + 1 characters of up to 4 bytes
+    try: return codecs.getincrementaldecoder('utf-8')().decode(raw, final=False) # A cut multi-byte tail is dropped
+    except UnicodeDecodeError: pass
+    return decode_text(raw, 'replace')[0] # Prompt text is never saved back, and the read may cut a character
+
+
 # --- Worker Class (Unchanged from previous working version) ---
 class GeminiWorker(QObject):
-    """Runs the Gemini API call in a separate thread."""
+    """Runs the Gemini API call on a pool thread (via _GeminiTask); the object itself stays on the GUI thread,
+    so its signals are queued to the controller."""
     started = Signal(str, str)
     chunk_received = Signal(str)
+    cache_hit = Signal(object) # Chunks of a cached answer to a similar question, sent instead of calling the API
     finished = Signal(str, str) # Context type might be modified on success
     error = Signal(str, str)
 
-    def __init__(self, model_name: str, prompt: str, context_type: str, sender: str = "Gemini", filename: typing.Optional[str] = None):
+    def __init__(self, model_name: str, prompt: str, context_type: str, sender: str = "Gemini", filename: typing.Optional[str] = None,
+                 cache: typing.Optional[PromptCache] = None, cache_key: typing.Optional[str] = None,
+                 cached_context: typing.Optional[tuple] = None, semantic: typing.Optional[tuple] = None):
         super().__init__()
         self.model_name = model_name
         self.prompt = prompt
         self.context_type = context_type
         self.sender = sender
         self.filename = filename # Store filename if provided
+        self.cache = cache; self.cache_key = cache_key # Where a complete response gets stored
+        self.cached_context = cached_context # (registry, key, context, rest of prompt) for server-side caching
+        self.semantic = semantic # (SemanticCache, text) where a complete response is also stored
         self._is_cancelled = False
+        # Chunks received but not yet emitted: each emit is a queued cross-thread call, so bursts go as one
+        self._pending = []; self._pending_len = 0; self._last_emit = 0.0
 
     @Slot()
     def run(self):
         """Performs the blocking API call and emits signals."""
         model_instance = None
         try:
-            print(f"[Worker {QThread.currentThread()}] Configuring Gemini for worker...")
+            if self.semantic is not None: # The lookup runs an embedding pass: here, not on the GUI thread
+                semantic_cache, semantic_text = self.semantic
+                cached_chunks = semantic_cache.get(self.model_name, semantic_text)
+                if self._is_cancelled: # Replaced by a newer request during the lookup: don't call the API
+                    self.error.emit("Stream cancelled", self.context_type)
+                    return
+                if cached_chunks is not None:
+                    self.cache_hit.emit(cached_chunks)
+                    return
+
+            logger.debug("Configuring Gemini for worker...")
             api_key = os.getenv("GOOGLE_API_KEY")
             if not api_key:
                 raise ValueError("GOOGLE_API_KEY not found in worker thread.")
+            genai = _get_genai()
             genai.configure(api_key=api_key)
 
             full_model_name = f"models/{self.model_name}"
-            safety_settings = [{"category": c, "threshold": "BLOCK_MEDIUM_AND_ABOVE"} for c in ["HARM_CATEGORY_HARASSMENT", "HARM_CATEGORY_HATE_SPEECH", "HARM_CATEGORY_SEXUALLY_EXPLICIT", "HARM_CATEGORY_DANGEROUS_CONTENT"]]
-            model_instance = genai.GenerativeModel(full_model_name, safety_settings=safety_settings)
+            prompt = self.prompt
+            if self.cached_context is not None:
+                model_instance, prompt = self._model_from_cached_context(full_model_name, _SAFETY_SETTINGS)
+            if model_instance is None:
+                model_instance = genai.GenerativeModel(full_model_name, safety_settings=_SAFETY_SETTINGS)
 
-            print(f"[Worker {QThread.currentThread()}] Starting API call (Context: {self.context_type}, Filename: {self.filename})...")
+            logger.debug("Starting API call (Context: %s, Filename: %s)...", self.context_type, self.filename)
             self.started.emit(self.sender, self.context_type)
 
-            response = model_instance.generate_content(self.prompt, stream=True)
+            response = model_instance.generate_content(prompt, stream=True)
 
-            print(f"[Worker {QThread.currentThread()}] --- Gemini Response Stream ({self.context_type}) ---")
+            logger.debug("--- Gemini Response Stream (%s) ---", self.context_type)
             stream_successful = True # Assume success initially
+            received = [] # Response text, kept for the prompt cache
             for chunk in response:
                  if self._is_cancelled:
-                      print(f"[Worker {QThread.currentThread()}] Stream cancelled by request.")
+                      logger.info("Stream cancelled by request.")
+                      self._emit_pending()
                       self.error.emit("Stream cancelled", self.context_type)
                       stream_successful = False; break
 
-                 if hasattr(chunk, 'prompt_feedback') and chunk.prompt_feedback and chunk.prompt_feedback.block_reason:
-                      reason = chunk.prompt_feedback.block_reason.name
-                      rating = next((r for r in chunk.prompt_feedback.safety_ratings if r.blocked), None)
+                 feedback = getattr(chunk, 'prompt_feedback', None) # One lookup per attribute per chunk
+                 if feedback and feedback.block_reason:
+                      reason = feedback.block_reason.name
+                      rating = next((r for r in feedback.safety_ratings if r.blocked), None)
                       category = getattr(rating.category, 'name', 'UNKNOWN') if rating else 'UNKNOWN'
                       error_msg = f"Error: Blocked by safety filters. Reason: {reason}. Category: {category}."
-                      print(f"[Worker {QThread.currentThread()}] Stream blocked: {reason} ({category})")
+                      logger.warning("Stream blocked: %s (%s)", reason, category)
+                      self._emit_pending()
                       self.error.emit(error_msg, self.context_type)
                       stream_successful = False; break # Stop processing
 
-                 if hasattr(chunk, 'text'):
-                    self.chunk_received.emit(chunk.text)
+                 text = getattr(chunk, 'text', None)
+                 if text:
+                    received.append(text)
+                    self._pending.append(text); self._pending_len += len(text)
+                    if (self._pending_len >= CHUNK_COALESCE_MAX_CHARS
+                            or time.monotonic() - self._last_emit >= CHUNK_COALESCE_S):
+                        self._emit_pending()
                  pass
 
             if stream_successful:
-                print(f"\n[Worker {QThread.currentThread()}] --- End Gemini Stream (Success) ---")
+                logger.debug("--- End Gemini Stream (Success) ---")
                 final_context_type = self.context_type
                 if self.context_type == 'file_create' and self.filename:
                     final_context_type = f"create_success:{self.filename}"
-                    print(f"[Worker {QThread.currentThread()}] Emitting success context: {final_context_type}")
+                    logger.debug("Emitting success context: %s", final_context_type)
+                self._emit_pending() # All text reaches the UI before the finish
                 self.finished.emit(self.sender, final_context_type)
+                # Caches are written after finished (off the GUI thread), so the UI never waits on them
+                if self.cache is not None and self.cache_key:
+                    self.cache.put(self.cache_key, received, self.model_name)
+                if self.semantic is not None: # May load the embedding model first
+                    semantic_cache, semantic_text = self.semantic
+                    semantic_cache.put(self.model_name, semantic_text, received)
             # Error signals handled by breaks or exceptions
 
         # Error Handling
-        except google_exceptions.PermissionDenied as e: msg = f"API Permission Denied: {e}"; self.error.emit(msg, self.context_type); print(f"[Worker Error] {msg}")
-        except google_exceptions.ResourceExhausted as e: msg = f"API Quota Exceeded: {e}"; self.error.emit(msg, self.context_type); print(f"[Worker Error] {msg}")
-        except google_exceptions.InvalidArgument as e:
-            if "User location is not supported" in str(e): msg = "API Error: Location not supported."
-            elif "API key not valid" in str(e): msg = f"API Error: API key not valid. {e}"
-            elif "found no valid candidate" in str(e): msg = f"API Error: No valid candidate found (Safety/Prompt issue?). {e}"
-            else: msg = f"API Invalid Argument: {e}"
-            self.error.emit(msg, self.context_type); print(f"[Worker Error] {msg}")
-        except google_exceptions.NotFound as e: msg = f"API Not Found: {e}"; self.error.emit(msg, self.context_type); print(f"[Worker Error] {msg}")
-        except google_exceptions.FailedPrecondition as e: msg = f"API Precondition Failed (Billing?): {e}"; self.error.emit(msg, self.context_type); print(f"[Worker Error] {msg}")
-        except google_exceptions.InternalServerError as e: msg = f"API Internal Server Error: {e}"; self.error.emit(msg, self.context_type); print(f"[Worker Error] {msg}")
-        except google_exceptions.ServiceUnavailable as e: msg = f"API Service Unavailable: {e}"; self.error.emit(msg, self.context_type); print(f"[Worker Error] {msg}")
         except Exception as e:
-            error_msg = f"Worker Thread Error: {type(e).__name__} - {e}"
+            error_msg = _api_error_message(e)
+            self._emit_pending() # Keep the partial result that arrived before the error
             self.error.emit(error_msg, self.context_type)
-            print(error_msg)
+            logger.error("%s", error_msg)
         finally:
             pass
 
+    def _emit_pending(self):
+        """Emits the buffered chunks as one chunk_received."""
+        if not self._pending: return
+        text = "".join(self._pending)
+        self._pending.clear(); self._pending_len = 0
+        self._last_emit = time.monotonic()
+        self.chunk_received.emit(text)
+
+    def _model_from_cached_context(self, full_model_name, safety_settings):
+        """Returns (model, prompt) using a server-side cached context for the static prompt part,
+        or (None, full prompt) if caching isn't available for this model/SDK."""
+        registry, key, context, rest = self.cached_context
+        genai = _get_genai()
+        if registry.get(full_model_name) is False: return None, self.prompt # Failed before for this model
+        try:
+            entry = registry.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                cached = genai.caching.CachedContent.create(model=full_model_name, contents=[context],
+                                                            ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL_S))
+                entry = (cached.name, time.monotonic() + CONTEXT_CACHE_TTL_S - 30) # Margin before the server drops it
+                registry[key] = entry
+            return genai.GenerativeModel.from_cached_content(entry[0], safety_settings=safety_settings), rest
+        except Exception as e:
+            registry.pop(key, None)
+            if _caching_unsupported(e):
+                registry[full_model_name] = False # Don't try again this session
+                logger.info("Context caching unsupported for %s, sending full prompts: %s", full_model_name, e)
+            else: # Timeout, server error, ...: only this request goes without
+                logger.info("Context cache unavailable, sending full prompt: %s", e)
+            return None, self.prompt
+
     def cancel(self):
         self._is_cancelled = True
 
 
+class _ReadFilesSignals(QObject):
+    done = Signal(object, object, object) # {path: content}, [(path, error)], continuation
+
+
+class _ReadFilesTask(QRunnable):
+    """Reads prompt files on a pool thread (several at once); results arrive on the GUI thread via signals."""
+    def __init__(self, paths, on_done, signals):
+        super().__init__()
+        self.paths = paths; self.on_done = on_done; self.signals = signals
+
+    def run(self):
+        contents = {}; errors = []
+        with ThreadPoolExecutor(max_workers=min(_READ_WORKERS, len(self.paths))) as pool: # File reads release the GIL
+            futures = [(path, pool.submit(_read_text_file, path)) for path in self.paths]
+            for path, future in futures: # Submission order, so prompts list files as selected
+                try: contents[path] = future.result()
+                except Exception as e_read: errors.append((path, e_read))
+        self.signals.done.emit(contents, errors, self.on_done)
+
+
+class _GeminiTask(QRunnable):
+    """Pool task running one GeminiWorker; holds the worker alive until run() has returned."""
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+
+    def run(self):
+        self.worker.run()
+
+
 # --- Main Controller Class ---
 class GeminiController(QObject):
     # <<< Signals MUST be defined at CLASS LEVEL >>>
@@ -118,7 +337,7 @@ class GeminiController(QObject):
     def __init__(self, file_pane_ref: 'FilePane', editor_pane_ref: 'EditorPane'):
         # <<< Call super().__init__() FIRST >>>
         super().__init__()
-        print("[Controller Init] super().__init__() called.") # Debug
+        logger.debug("super().__init__() called.")
 
         # Assign references
         self.file_pane = file_pane_ref
@@ -129,13 +348,36 @@ class GeminiController(QObject):
         self.available_models = []
         self.model_instance = None
         self._is_configured = False
-        self._active_thread = None
-        self._active_worker = None
+        self._active_worker = None # Worker of the request currently streaming (earlier ones get cancelled)
+        # Gemini requests block on the network for seconds: own pool, so file loads and Markdown rendering
+        # on the global pool never wait behind them
+        self._api_pool = QThreadPool(self)
+        self._api_pool.setMaxThreadCount(API_MAX_THREADS)
+        self._read_signals = _ReadFilesSignals(self) # Lives on the GUI thread, so emits are queued here
+        self._read_signals.done.connect(self._on_files_read)
+        self.active_context_type = None # Context of the stream currently feeding chunks (API or cache replay)
+
+        # Completed responses, replayed instead of calling the API for a repeated prompt
+        self.prompt_cache = PromptCache()
+        self.semantic_cache = SemanticCache() # Second tier for paraphrased standard chat questions (opt-in, see below)
+        # Server-side cached contexts (large edit content): key -> (cache name, expiry); model name -> False if unsupported
+        self._context_caches = {}
+        self._context_prefixes_seen = OrderedDict() # Keys of recent large prompt prefixes, oldest first
+        self._replay_chunks = deque()
+        self._replay_end = None # (sender, final context type) emitted once the replay runs out
+        self._replay_timer = QTimer(self)
+        self._replay_timer.setInterval(CACHE_REPLAY_INTERVAL_MS)
+        self._replay_timer.timeout.connect(self._replay_next_chunk)
+        # Chat commands: handler(args_str, current_dir) per lowercased command word
+        self._commands = {"/create": self._cmd_create, "/explain": self._cmd_explain, "/edit": self._cmd_edit,
+                          "/explain_editor": self._cmd_explain_editor, "/edit_editor": self._cmd_edit_editor}
 
         # <<< QSettings Initialization >>>
         # Use appropriate organization and application names
         self.settings = QSettings("YourOrgName", "GemNet") # Use your actual org name
-        print("[Controller Init] QSettings initialized.") # Debug
+        # The semantic cache loads (and on first use downloads) an embedding model, so it stays off unless enabled
+        self.semantic_cache.enabled = self.settings.value("cache/semantic_enabled", False, type=bool)
+        logger.debug("QSettings initialized.")
 
         # <<< Load Saved Model or Use Default >>>
         default_model = "gemini-1.5-flash-latest"
@@ -143,26 +385,28 @@ class GeminiController(QObject):
         saved_model = self.settings.value("gemini/selected_model", defaultValue=default_model)
         # Ensure saved_model is a string, handle potential None from settings
         self.selected_model_name = str(saved_model) if saved_model is not None else default_model
-        print(f"[Controller Init] Loaded selected model: {self.selected_model_name}") # Debug
+        logger.debug("Loaded selected model: %s", self.selected_model_name)
 
         # <<< Configure Gemini AFTER setting up attributes >>>
-        self._configure_gemini()
-        print("[Controller Init] Initialization complete.") # Debug
+        # Deferred to the event loop: the window shows before the Gemini SDK is imported, and the
+        # status signals emitted during configuration reach the UI connected after construction
+        QTimer.singleShot(0, self._configure_gemini)
+        logger.debug("Initialization complete.")
 
 
     def _configure_gemini(self):
         """Configures the Gemini API client using environment variables."""
         # <<< Add check here to ensure signal exists before emitting >>>
         if not hasattr(self, 'initialization_status'):
-             print("[ERROR] _configure_gemini: initialization_status signal not found on self!")
+             logger.error("_configure_gemini: initialization_status signal not found on self!")
              # Cannot proceed without the signal
              return
         if not hasattr(self, 'status_update'):
-             print("[ERROR] _configure_gemini: status_update signal not found on self!")
+             logger.error("_configure_gemini: status_update signal not found on self!")
              # Cannot proceed without the signal
              return
 
-        print("[Configure Gemini] Attempting configuration...") # Debug
+        logger.debug("Attempting configuration...")
         try:
             api_key = os.getenv("GOOGLE_API_KEY")
             if not api_key:
@@ -170,19 +414,19 @@ class GeminiController(QObject):
                 self.initialization_status.emit("API Key Error: GOOGLE_API_KEY environment variable not set.", False)
                 self.status_update.emit("Error", "Gemini API Key not found. Please set GOOGLE_API_KEY.")
                 self._is_configured = False
-                print("[Configure Gemini] GOOGLE_API_KEY not found.") # Debug
+                logger.warning("GOOGLE_API_KEY not found.")
                 return
 
-            genai.configure(api_key=api_key)
+            _get_genai().configure(api_key=api_key)
             self._is_configured = True
             self.initialization_status.emit("Gemini API Configured.", True)
             self.status_update.emit("GemNet", "Gemini API configured successfully.")
-            print("[Configure Gemini] API Configured. Fetching models...") # Debug
+            logger.debug("API Configured. Fetching models...")
             self.update_available_models() # Fetch models after configuring API key access
 
         except Exception as e:
             error_msg = f"Gemini Configuration Failed: {e}"
-            print(f"[Configure Gemini] Configuration failed: {e}") # Debug
+            logger.warning("Configuration failed: %s", e)
             # Check again before emitting in except block
             if hasattr(self, 'initialization_status'):
                 self.initialization_status.emit(error_msg, False)
@@ -195,20 +439,25 @@ class GeminiController(QObject):
 
 
     # --- update_available_models (No QSettings changes needed here) ---
-    def update_available_models(self):
-        """Fetches and updates the list of available generative models."""
+    def update_available_models(self, force=False):
+        """Fetches and updates the list of available generative models.
+        A list fetched less than MODELS_CACHE_TTL_S ago with the same API key is reused unless force is set."""
         if not self._is_configured:
             self.status_update.emit("GemNet", "Cannot fetch models, API not configured.")
             self.available_models = []; self.available_models_updated.emit([])
             return
+        from google.api_core import exceptions as google_exceptions # Loaded with the SDK by _configure_gemini
         try:
-            self.status_update.emit("GemNet", "Fetching available Gemini models...")
-            models = genai.list_models()
-            self.available_models = []
-            # Filter for models supporting 'generateContent' and use the short name
-            for m in models:
-                if 'generateContent' in m.supported_generation_methods and m.name.startswith("models/"):
-                    self.available_models.append(m.name.split('/')[-1])
+            key_hash = _api_key_hash(os.getenv("GOOGLE_API_KEY", ""))
+            cached_models = None if force else _load_cached_models(key_hash)
+            if cached_models is not None:
+                self.available_models = cached_models
+            else:
+                self.status_update.emit("GemNet", "Fetching available Gemini models...")
+                # Filter for models supporting 'generateContent' and use the short name
+                self.available_models = [m.name[7:] for m in _get_genai().list_models()
+                                         if m.name.startswith("models/") and 'generateContent' in m.supported_generation_methods]
+                if self.available_models: _store_cached_models(key_hash, self.available_models)
 
             # Default model logic
             if not self.available_models:
@@ -230,12 +479,12 @@ class GeminiController(QObject):
         # Error handling...
         except google_exceptions.PermissionDenied as e:
              msg = f"API Key Error: Could not list models. Check Key Permissions. {e}"
-             self.status_update.emit("Error", msg); print(msg)
+             self.status_update.emit("Error", msg); logger.error("%s", msg)
              self.available_models = []; self.available_models_updated.emit([])
         except google_exceptions.InvalidArgument as e:
             if "API key not valid" in str(e): msg = f"API Key Error: Key is not valid. {e}"
             else: msg = f"API Error listing models: {e}"
-            self.status_update.emit("Error", msg); print(msg)
+            self.status_update.emit("Error", msg); logger.error("%s", msg)
             self.available_models = []; self.available_models_updated.emit([])
         except Exception as e:
             self.status_update.emit("Error", f"Could not fetch Gemini models: {e}")
@@ -262,46 +511,60 @@ class GeminiController(QObject):
 
             # <<<--- Save the new selection (unless it's during initial load correction) --- >>>
             if not initial_load:
-                print(f"[Controller] Saving selected model preference: {model_short_name}")
+                logger.debug("Saving selected model preference: %s", model_short_name)
                 # Ensure settings object exists
                 if hasattr(self, 'settings') and self.settings:
                      self.settings.setValue("gemini/selected_model", model_short_name)
                 else:
-                     print("[Controller Error] Cannot save setting, QSettings object not found.")
-
-    # --- _read_files (Unchanged) ---
-    def _read_files(self, file_paths):
-        # (Keep implementation as it was)
-        contents = {}; total_size = 0
+                     logger.error("Cannot save setting, QSettings object not found.")
+
+    def set_semantic_cache_enabled(self, enabled):
+        """Turns paraphrase matching on or off and saves the preference."""
+        self.semantic_cache.enabled = bool(enabled)
+        self.settings.setValue("cache/semantic_enabled", bool(enabled))
+        if not enabled: self.semantic_cache.clear()
+
+    def clear_cache(self):
+        """Forgets all cached responses, so the next request of every prompt goes to the API."""
+        self.prompt_cache.clear()
+        self.semantic_cache.clear()
+        self.status_update.emit("GemNet", "Response cache cleared.")
+
+    # --- _read_files ---
+    def _read_files(self, file_paths, on_done):
+        """Reads the given text files for a prompt (size-limited) on a pool thread,
+        then calls on_done({path: content}) on the GUI thread."""
+        total_size = 0
         max_size_per_file = 250*1024; max_total_size = 1.5*1024*1024
+        # One stat() per path for existence, type and size; the reads themselves then run in parallel
+        to_read = []
         for path in file_paths:
-            try:
-                if not os.path.exists(path): self.status_update.emit("Error", f"File not found: {path}"); continue
-                if not os.path.isfile(path): self.status_update.emit("Warning", f"Skipping directory: {os.path.basename(path)}"); continue
-                f_size = os.path.getsize(path)
-                if f_size > max_size_per_file: self.status_update.emit("Warning", f"Skipping large file {os.path.basename(path)}"); continue
-                if total_size + f_size > max_total_size: self.status_update.emit("Warning", f"Total size limit reached, skipping {os.path.basename(path)}"); break
-                self.status_update.emit("GemNet", f"Reading file: {os.path.basename(path)}...")
-                content = None
-                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                    try:
-                        with open(path, 'r', encoding=encoding) as f: content = f.read(); break
-                    except UnicodeDecodeError: continue
-                    except Exception as e_read: self.status_update.emit("Error", f"Error reading {path}: {e_read}"); content = None; break
-                if content is None:
-                     if 'e_read' in locals() and not isinstance(e_read, UnicodeDecodeError): pass # Error already emitted
-                     else: self.status_update.emit("Error", f"Could not decode {path}");
-                     continue
-                contents[path] = content; total_size += f_size
-            except Exception as e: self.status_update.emit("Error", f"Could not access {path}: {e}")
-        return contents
+            try: st = os.stat(path)
+            except FileNotFoundError: self.status_update.emit("Error", f"File not found: {path}"); continue
+            except OSError as e: self.status_update.emit("Error", f"Could not access {path}: {e}"); continue
+            if not stat.S_ISREG(st.st_mode): self.status_update.emit("Warning", f"Skipping directory: {os.path.basename(path)}"); continue
+            f_size = st.st_size; name = os.path.basename(path)
+            if f_size > max_size_per_file: self.status_update.emit("Warning", f"Skipping large file {name}"); continue
+            if total_size + f_size > max_total_size: self.status_update.emit("Warning", f"Total size limit reached, skipping {name}"); break
+            self.status_update.emit("GemNet", f"Reading file: {name}...")
+            to_read.append(path); total_size += f_size
+        if not to_read: on_done({}); return
+        QThreadPool.globalInstance().start(_ReadFilesTask(to_read, on_done, self._read_signals))
+
+    @Slot(object, object, object)
+    def _on_files_read(self, contents, errors, on_done):
+        for path, e in errors: self.status_update.emit("Error", f"Error reading {path}: {e}")
+        on_done(contents)
 
 
     # --- _stream_gemini_api (Unchanged from previous working version) ---
-    def _stream_gemini_api(self, prompt: str, context_type: str, sender: str = "Gemini", filename_for_create: typing.Optional[str] = None):
+    def _stream_gemini_api(self, prompt: str, context_type: str, sender: str = "Gemini", filename_for_create: typing.Optional[str] = None,
+                           context_prefix: typing.Optional[str] = None, semantic_text: typing.Optional[str] = None):
         """
         Starts the Gemini API streaming call in a separate thread.
         Passes filename to worker if context is 'file_create'.
+        context_prefix: leading part of prompt that may be sent once as a server-side cached context.
+        semantic_text: for free-form chat only, the text matched against paraphrases in the semantic cache.
         """
         if not self._is_configured:
              self.stream_error.emit("Error: Gemini API not configured.", context_type)
@@ -310,88 +573,132 @@ class GeminiController(QObject):
             self.stream_error.emit("Error: No model selected.", context_type)
             return
 
-        if self._active_thread and self._active_thread.isRunning():
-            print("[Controller] Attempting to cancel previous stream request...")
-            if self._active_worker:
-                self._active_worker.cancel()
+        if self._active_worker is not None:
+            logger.debug("Attempting to cancel previous stream request...")
+            self._active_worker.cancel()
+        if self._replay_timer.isActive(): # A cached replay is still running: end it like a cancelled stream
+            self._replay_timer.stop(); self._replay_chunks.clear()
+            self.on_stream_error("Stream cancelled", self.active_context_type)
+
+        self.active_context_type = context_type
+        cache_key = prompt_key(self.selected_model_name, prompt)
+        cached_chunks = self.prompt_cache.get(cache_key) # Similar questions are looked up by the worker
+        if cached_chunks is not None:
+            final_context_type = f"create_success:{filename_for_create}" if context_type == 'file_create' and filename_for_create else context_type
+            self._start_replay(cached_chunks, sender, context_type, final_context_type)
+            return
 
         self.status_update.emit(sender, f"Sending request to {self.selected_model_name}...")
-        print(f"\n--- Gemini Prompt ({self.selected_model_name}) Context: {context_type} Filename: {filename_for_create} ---\n{prompt[:500]}...\n--- End Prompt ---")
+        if logger.isEnabledFor(logging.DEBUG): # Skip slicing the prompt when nobody reads it
+            logger.debug("--- Gemini Prompt (%s) Context: %s Filename: %s ---\n%s...\n--- End Prompt ---",
+                         self.selected_model_name, context_type, filename_for_create, prompt[:500])
+
+        cached_context = None
+        if (context_prefix and len(context_prefix) >= _context_cache_min_chars(self.selected_model_name)
+                and prompt.startswith(context_prefix)):
+            context_key = prompt_key(self.selected_model_name, context_prefix)
+            seen = self._context_prefixes_seen
+            if context_key in seen: # Second use: worth caching server-side
+                seen.move_to_end(context_key)
+                cached_context = (self._context_caches, context_key, context_prefix, prompt[len(context_prefix):])
+            else:
+                seen[context_key] = True
+                while len(seen) > CONTEXT_PREFIXES_REMEMBERED: seen.popitem(last=False)
 
-        self._active_thread = QThread()
         self._active_worker = GeminiWorker(
             self.selected_model_name, prompt, context_type, sender,
-            filename=filename_for_create
+            filename=filename_for_create, cache=self.prompt_cache, cache_key=cache_key,
+            cached_context=cached_context,
+            semantic=(self.semantic_cache, semantic_text) if semantic_text else None
         )
-        self._active_worker.moveToThread(self._active_thread)
-
         self._active_worker.started.connect(self.on_stream_started)
         self._active_worker.chunk_received.connect(self.on_stream_chunk_received)
+        self._active_worker.cache_hit.connect(self._on_cache_hit)
+        self._active_worker.cache_hit.connect(self._release_worker)
         self._active_worker.finished.connect(self.on_stream_finished)
         self._active_worker.error.connect(self.on_stream_error)
-        self._active_thread.started.connect(self._active_worker.run)
-        self._active_worker.finished.connect(self._cleanup_thread)
-        self._active_worker.error.connect(self._cleanup_thread)
+        self._active_worker.finished.connect(self._release_worker)
+        self._active_worker.error.connect(self._release_worker)
 
-        self._active_thread.start()
+        self._api_pool.start(_GeminiTask(self._active_worker))
 
 
     # --- Slots for Worker Signals (Unchanged) ---
     @Slot(str, str)
     def on_stream_started(self, sender, context_type):
-        print(f"[Controller MainThread] Worker reported stream started ({sender}/{context_type})")
+        logger.debug("Worker reported stream started (%s/%s)", sender, context_type)
         self.stream_started.emit(sender, context_type)
 
     @Slot(str)
     def on_stream_chunk_received(self, chunk):
-        self.stream_chunk_received.emit(chunk)
+        self.stream_chunk_received.emit(chunk) # Already coalesced by the worker
 
     @Slot(str, str)
     def on_stream_finished(self, sender, context_type):
-        print(f"[Controller MainThread] Worker reported stream finished ({sender}/{context_type})")
+        logger.debug("Worker reported stream finished (%s/%s)", sender, context_type)
         self.status_update.emit(sender, "Received full response.")
         self.stream_finished.emit(sender, context_type)
         # Context clearing now handled by MainWindow
 
     @Slot(str, str)
     def on_stream_error(self, error_message, context_type):
-        print(f"[Controller MainThread] Worker reported error ({context_type}): {error_message}")
+        logger.debug("Worker reported error (%s): %s", context_type, error_message)
         self.status_update.emit("Error", f"Stream Error: {error_message}")
         self.stream_error.emit(error_message, context_type)
         # Context clearing now handled by MainWindow
 
+    @Slot(object)
+    def _on_cache_hit(self, chunks):
+        """Replays the semantic cache's answer found by the worker, unless a newer request replaced it."""
+        worker = self.sender()
+        if worker is not self._active_worker: return
+        self._start_replay(chunks, worker.sender, worker.context_type, worker.context_type)
+
+    def _start_replay(self, chunks, sender, context_type, final_context_type):
+        """Streams a cached response to the UI at the replay pace, then finishes it like an API stream."""
+        self.status_update.emit(sender, f"Using cached response from {self.selected_model_name}.")
+        self._replay_chunks.extend(chunks)
+        self._replay_end = (sender, final_context_type)
+        self.on_stream_started(sender, context_type)
+        self._replay_timer.start()
+
+    def _replay_next_chunk(self):
+        """Emits the next chunk of a cached response; finishes the stream once all are out."""
+        if self._replay_chunks:
+            self.on_stream_chunk_received(self._replay_chunks.popleft())
+            return
+        self._replay_timer.stop()
+        sender, final_context_type = self._replay_end
+        self.on_stream_finished(sender, final_context_type)
+
     @Slot()
-    def _cleanup_thread(self):
-        """Cleans up the thread and worker after completion or error."""
-        print("[Controller MainThread] Cleaning up worker thread...")
-        if self._active_thread and self._active_thread.isRunning():
-             self._active_thread.quit()
-             self._active_thread.wait(500)
-        if self._active_worker: self._active_worker.deleteLater()
-        if self._active_thread: self._active_thread.deleteLater()
-        self._active_thread = None
-        self._active_worker = None
-        print("[Controller MainThread] Cleanup complete.")
+    def _release_worker(self):
+        """Forgets a worker that finished or failed; a cancelled one must not clear its successor."""
+        if self.sender() is self._active_worker:
+            self._active_worker = None
+        logger.debug("Worker released.")
 
     # --- Request Methods (Unchanged logic, context clearing removed here) ---
     def request_explanation(self, file_paths):
-        contents = self._read_files(file_paths)
+        self._read_files(file_paths, self._explain_contents) # Continues once the files are read
+
+    def _explain_contents(self, contents):
         if not contents:
             self.stream_error.emit("No files were read successfully to explain.", 'chat')
             return
-        prompt = "You are a helpful assistant integrated into a development tool called GemNet.\n"
-        prompt += "Please explain the purpose and high-level functionality of the following file(s):\n\n"
+        parts = ["You are a helpful assistant integrated into a development tool called GemNet.\n",
+                 "Please explain the purpose and high-level functionality of the following file(s):\n\n"]
         for path, content in contents.items():
-            prompt += f"--- File: {os.path.basename(path)} ---\n"
-            truncated_content = content[:10000]
-            prompt += truncated_content + ("\n[... content truncated ...]\n" if len(content) > 10000 else "")
-            prompt += "---\n"
-        prompt += "Provide the explanation below:"
+            parts.append(f"--- File: {os.path.basename(path)} ---\n{_truncated(content, 10000)}---\n")
+        parts.append("Provide the explanation below:")
+        prompt = "".join(parts)
         # Context should be cleared by caller or on finish/error
         self._stream_gemini_api(prompt, context_type='chat', sender="Gemini")
 
     def request_edit(self, file_paths, instructions):
-        contents = self._read_files(file_paths)
+        self._read_files(file_paths, functools.partial(self._edit_contents, file_paths, instructions))
+
+    def _edit_contents(self, file_paths, instructions, contents):
         if not contents or not file_paths:
             self.stream_error.emit("Cannot edit: File(s) could not be read or path missing.", 'editor')
             return
@@ -401,43 +708,40 @@ class GeminiController(QObject):
         if target_content is None:
              self.stream_error.emit(f"Could not read '{target_filename}' for editing.", 'editor')
              return
-        prompt = self._build_edit_prompt(target_filename, target_content, instructions, contents)
+        context, prompt = self._build_edit_prompt(target_filename, target_content, instructions, contents)
         # Context already set by caller (MainWindow or process_user_chat)
-        self._stream_gemini_api(prompt, context_type='editor', sender="Gemini")
+        self._stream_gemini_api(prompt, context_type='editor', sender="Gemini", context_prefix=context)
 
-    # --- _build_edit_prompt (Unchanged) ---
+    # --- _build_edit_prompt ---
     def _build_edit_prompt(self, target_filename, target_content, instructions, context_files=None):
-        # (Keep implementation as it was)
-        prompt = "You are a helpful coding assistant integrated into a development tool called GemNet.\n"
-        prompt += f"The user wants to modify the code/text (currently in '{target_filename}' if known, otherwise in the editor tab) based on the following instructions.\n"
-        if context_files:
-             other_files = {p: c for p, c in context_files.items() if os.path.basename(p) != target_filename}
-             if other_files:
-                 prompt += "Additional context from other selected files is provided below the main content.\n"
-        prompt += f"Instructions: '{instructions}'\n\n"
-        prompt += f"--- Content to Edit ('{target_filename}' or Current Tab) ---\n"
-        truncated_content = target_content[:20000]
-        prompt += truncated_content + ("\n[... content truncated ...]\n" if len(target_content) > 20000 else "")
-        prompt += "\n---\n"
-        if context_files and other_files:
-            for path, content in other_files.items():
-                prompt += f"\n--- Context File: {os.path.basename(path)} ---\n"
-                truncated_context = content[:5000]
-                prompt += truncated_context + ("\n[... content truncated ...]\n" if len(content) > 5000 else "")
-                prompt += "\n---\n"
-        prompt += f"\nBased ONLY on the provided content and instructions, generate the COMPLETE, modified content.\n"
-        prompt += f"IMPORTANT: Output *only* the raw, modified code/text. Do not include explanations, introductions, apologies, ```markdown formatting```, or any text other than the content itself."
-        return prompt
+        """Returns (context, prompt): prompt is the full request and starts with context, the part that
+        doesn't depend on the instructions (cacheable server-side across edits of the same content)."""
+        # (name, content) of the other files; basename computed once per path
+        other_files = [(name, c) for name, c in ((os.path.basename(p), c) for p, c in context_files.items())
+                       if name != target_filename] if context_files else []
+        parts = ["You are a helpful coding assistant integrated into a development tool called GemNet.\n",
+                 f"The user wants to modify the code/text (currently in '{target_filename}' if known, otherwise in the editor tab) based on the instructions given after the content.\n"]
+        if other_files:
+            parts.append("Additional context from other selected files is provided below the main content.\n")
+        parts.append(f"\n--- Content to Edit ('{target_filename}' or Current Tab) ---\n{_truncated(target_content, 20000)}\n---\n")
+        for name, content in other_files:
+            parts.append(f"\n--- Context File: {name} ---\n{_truncated(content, 5000)}\n---\n")
+        context = "".join(parts)
+        prompt = "".join((context,
+                          f"\nInstructions: '{instructions}'\n",
+                          "\nBased ONLY on the provided content and instructions, generate the COMPLETE, modified content.\n",
+                          "IMPORTANT: Output *only* the raw, modified code/text. Do not include explanations, introductions, apologies, ```markdown formatting```, or any text other than the content itself."))
+        return context, prompt
 
     # --- process_user_chat (Unchanged logic from previous working version) ---
     def process_user_chat(self, message):
-        print(f"[Controller DEBUG] Processing chat message: '{message[:100]}...' Context: {self.current_context}")
+        logger.debug("Processing chat message: '%s...' Context: %s", message[:100], self.current_context)
         action = self.current_context.get('action')
 
         if action == 'edit':
             files = self.current_context.get('files')
             if files:
-                 print("[Controller DEBUG] Handling message as edit instruction (context: file).")
+                 logger.debug("Handling message as edit instruction (context: file).")
                  self.request_edit(files, message)
                  # Context cleared by MainWindow on finish/error
                  return
@@ -446,31 +750,32 @@ class GeminiController(QObject):
                  self.set_context({}) # Clear broken context
                  return
         elif action == 'edit_editor':
-            print("[Controller DEBUG] Handling message as edit instruction (context: editor).")
+            logger.debug("Handling message as edit instruction (context: editor).")
             editor_path = self.current_context.get('path', 'current tab')
             editor_content = self.editor_pane.get_current_content()
             if editor_content is not None:
                  filename_hint = os.path.basename(editor_path) if editor_path and editor_path != 'current tab' else 'current tab'
-                 prompt = self._build_edit_prompt(filename_hint, editor_content, message)
-                 self._stream_gemini_api(prompt, context_type='editor', sender="Gemini")
+                 context, prompt = self._build_edit_prompt(filename_hint, editor_content, message)
+                 self._stream_gemini_api(prompt, context_type='editor', sender="Gemini", context_prefix=context)
                  # Context cleared by MainWindow on finish/error
             else:
                  self.stream_error.emit("Cannot edit: No active editor tab found or content is inaccessible.", 'editor')
                  self.set_context({}) # Clear broken context
             return
         elif action == 'create': # User entered description AFTER /create command
-            print("[Controller DEBUG] Handling message as create description.")
+            logger.debug("Handling message as create description.")
             filename = self.current_context.get('filename')
             description = message
             if filename:
-                content_prompt = "You are a helpful file generation assistant called GemNet.\n"
-                content_prompt += f"The user wants to create a file named '{filename}' with the following purpose/content described:\n"
-                content_prompt += f"Description: '{description}'\n\n"
-                content_prompt += "Generate ONLY the raw file content based on the description.\n"
-                content_prompt += "IMPORTANT: Do NOT include the filename, explanations, introductions, apologies, ```markdown formatting```, or any text other than the required file content itself."
+                content_prompt = "".join((
+                    "You are a helpful file generation assistant called GemNet.\n",
+                    f"The user wants to create a file named '{filename}' with the following purpose/content described:\n",
+                    f"Description: '{description}'\n\n",
+                    "Generate ONLY the raw file content based on the description.\n",
+                    "IMPORTANT: Do NOT include the filename, explanations, introductions, apologies, ```markdown formatting```, or any text other than the required file content itself."))
 
                 self.current_context['action'] = 'creating_file'
-                print(f"[Controller DEBUG] Updated context action to 'creating_file' for {filename}")
+                logger.debug("Updated context action to 'creating_file' for %s", filename)
 
                 self._stream_gemini_api(
                     content_prompt, context_type='file_create', sender="Gemini",
@@ -486,101 +791,102 @@ class GeminiController(QObject):
         parts = message.strip().split(maxsplit=1)
         command = parts[0].lower() if parts else ""
         args_str = parts[1].strip() if len(parts) > 1 else ""
-        current_dir = self.file_pane.get_current_view_path()
-
-        if command == "/create":
-             filename_raw = args_str
-             if filename_raw:
-                 safe_filename = "".join(c for c in filename_raw if c.isalnum() or c in ('.', '_', '-', ' ')).strip()
-                 if not safe_filename or safe_filename in [".", "_", "-"] or safe_filename.startswith('.') or safe_filename.endswith('.'):
-                     safe_filename = f"gemini_generated_{safe_filename}.txt" if safe_filename else "gemini_generated_file.txt"
-                 self.set_context({'action': 'create', 'filename': safe_filename})
-                 prompt_msg = f"Creating '{safe_filename}'. Provide description/content prompt in next message."
-                 self.edit_context_set_from_chat.emit(prompt_msg)
-                 self.status_update.emit("GemNet", f"Ready for description for {safe_filename}...")
-             else:
-                 self.stream_error.emit("Usage: /create <filename>\n(Provide description in the next message)", 'chat')
-             return # Wait for next message
-
-        elif command == "/explain":
-            filename = args_str
-            if filename:
-                 full_path = os.path.join(current_dir, filename)
-                 if os.path.isfile(full_path):
-                     self.status_update.emit("GemNet", f"Requesting explanation for {filename}...")
-                     self.set_context({}) # Clear context before explain
-                     self.request_explanation([full_path])
-                 else:
-                     self.stream_error.emit(f"Error: File '{filename}' not found in '{os.path.basename(current_dir)}'.", 'chat')
-                     self.set_context({}) # Clear context on error
-            else:
-                self.stream_error.emit("Usage: /explain <filename>", 'chat')
-                self.set_context({}) # Clear context on error
-            return
-
-        elif command == "/edit":
-             filename = args_str
-             if filename:
-                 full_path = os.path.join(current_dir, filename)
-                 if os.path.isfile(full_path):
-                     self.edit_file_requested_from_chat.emit(full_path)
-                     self.set_context({'action': 'edit', 'files': [full_path]})
-                     prompt_msg = f"Editing '{filename}'. Provide instructions in next message."
-                     self.edit_context_set_from_chat.emit(prompt_msg)
-                     self.status_update.emit("GemNet", f"Ready for edit instructions for {filename}...")
-                 else:
-                     self.stream_error.emit(f"Error: File '{filename}' not found in '{os.path.basename(current_dir)}'.", 'chat')
-                     self.set_context({}) # Clear context on error
+        handler = self._commands.get(command)
+        if handler:
+            return handler(args_str, self.file_pane.get_current_view_path())
+        # Standard Chat
+        logger.debug("Handling as standard chat message.")
+        prompt = f"You are a helpful assistant called GemNet. Respond concisely and helpfully.\n\nUser: {message}\n\nAssistant:"
+        self.set_context({}) # Clear context before standard chat
+        self._stream_gemini_api(prompt, context_type='chat', sender="Gemini", semantic_text=message)
+
+    def _cmd_create(self, args_str, current_dir):
+        """/create <filename>: remembers the sanitized filename; the next message describes the content."""
+        filename_raw = args_str
+        if filename_raw:
+            safe_filename = _FILENAME_RE.sub('', filename_raw).strip()
+            if not safe_filename or safe_filename in [".", "_", "-"] or safe_filename.startswith('.') or safe_filename.endswith('.'):
+                safe_filename = f"gemini_generated_{safe_filename}.txt" if safe_filename else "gemini_generated_file.txt"
+            self.set_context({'action': 'create', 'filename': safe_filename})
+            prompt_msg = f"Creating '{safe_filename}'. Provide description/content prompt in next message."
+            self.edit_context_set_from_chat.emit(prompt_msg)
+            self.status_update.emit("GemNet", f"Ready for description for {safe_filename}...")
+        else:
+            self.stream_error.emit("Usage: /create <filename>\n(Provide description in the next message)", 'chat')
+
+    def _cmd_explain(self, args_str, current_dir):
+        """/explain <filename>: explains a file from the current file pane directory."""
+        filename = args_str
+        if filename:
+             full_path = os.path.join(current_dir, filename)
+             if os.path.isfile(full_path):
+                 self.status_update.emit("GemNet", f"Requesting explanation for {filename}...")
+                 self.set_context({}) # Clear context before explain
+                 self.request_explanation([full_path])
              else:
-                 self.stream_error.emit("Usage: /edit <filename>", 'chat')
+                 self.stream_error.emit(f"Error: File '{filename}' not found in '{os.path.basename(current_dir)}'.", 'chat')
                  self.set_context({}) # Clear context on error
-             return # Wait for next message
-
-        elif command == "/explain_editor":
-            editor_content = self.editor_pane.get_current_content()
-            editor_path = self.editor_pane.get_current_path()
-            filename_hint = os.path.basename(editor_path) if editor_path else "current tab"
-            if editor_content is not None:
-                 self.status_update.emit("GemNet", f"Requesting explanation for {filename_hint}...")
-                 prompt = "You are a helpful assistant integrated into a development tool called GemNet.\n"
-                 prompt += f"Please explain the purpose and high-level functionality of the following code/text currently open in the editor tab (source file: '{filename_hint}'):\n\n"
-                 prompt += f"--- Editor Content ---\n"
-                 truncated_content = editor_content[:15000]
-                 prompt += truncated_content + ("\n[... content truncated ...]\n" if len(editor_content) > 15000 else "")
-                 prompt += "\n---\n"
-                 prompt += "Provide the explanation below:"
-                 self.set_context({}) # Clear context before explain
-                 self._stream_gemini_api(prompt, context_type='chat', sender="Gemini")
+        else:
+            self.stream_error.emit("Usage: /explain <filename>", 'chat')
+            self.set_context({}) # Clear context on error
+
+    def _cmd_edit(self, args_str, current_dir):
+        """/edit <filename>: opens a file from the current directory; the next message holds the instructions."""
+        filename = args_str
+        if filename:
+            full_path = os.path.join(current_dir, filename)
+            if os.path.isfile(full_path):
+                self.edit_file_requested_from_chat.emit(full_path)
+                self.set_context({'action': 'edit', 'files': [full_path]})
+                prompt_msg = f"Editing '{filename}'. Provide instructions in next message."
+                self.edit_context_set_from_chat.emit(prompt_msg)
+                self.status_update.emit("GemNet", f"Ready for edit instructions for {filename}...")
             else:
-                self.stream_error.emit("Error: No active editor tab found to explain.", 'chat')
+                self.stream_error.emit(f"Error: File '{filename}' not found in '{os.path.basename(current_dir)}'.", 'chat')
                 self.set_context({}) # Clear context on error
-            return
-
-        elif command == "/edit_editor":
-             current_widget = self.editor_pane.tab_widget.currentWidget()
-             if current_widget:
-                 editor_path_prop = current_widget.property("file_path")
-                 filename_hint = os.path.basename(editor_path_prop) if editor_path_prop else "current tab"
-                 self.set_context({'action': 'edit_editor', 'path': editor_path_prop if editor_path_prop else 'current tab'})
-                 prompt_msg = f"Editing content of '{filename_hint}'. Provide instructions in next message."
-                 self.edit_context_set_from_chat.emit(prompt_msg)
-                 self.status_update.emit("GemNet", f"Ready for edit instructions for {filename_hint}...")
-             else:
-                 self.stream_error.emit("Error: No active editor tab found to edit.", 'chat')
-                 self.set_context({}) # Clear context on error
-             return # Wait for next message
-        else: # Standard Chat
-            print("[Controller DEBUG] Handling as standard chat message.")
-            prompt = "You are a helpful assistant called GemNet. Respond concisely and helpfully.\n"
-            prompt += f"\nUser: {message}\n\nAssistant:"
-            self.set_context({}) # Clear context before standard chat
-            self._stream_gemini_api(prompt, context_type='chat', sender="Gemini")
+        else:
+            self.stream_error.emit("Usage: /edit <filename>", 'chat')
+            self.set_context({}) # Clear context on error
+
+    def _cmd_explain_editor(self, args_str, current_dir):
+        """/explain_editor: explains the content of the current editor tab."""
+        editor_content = self.editor_pane.get_current_content()
+        editor_path = self.editor_pane.get_current_path()
+        filename_hint = os.path.basename(editor_path) if editor_path else "current tab"
+        if editor_content is not None:
+             self.status_update.emit("GemNet", f"Requesting explanation for {filename_hint}...")
+             prompt = "".join((
+                 "You are a helpful assistant integrated into a development tool called GemNet.\n",
+                 f"Please explain the purpose and high-level functionality of the following code/text currently open in the editor tab (source file: '{filename_hint}'):\n\n",
+                 "--- Editor Content ---\n",
+                 _truncated(editor_content, 15000),
+                 "\n---\n",
+                 "Provide the explanation below:"))
+             self.set_context({}) # Clear context before explain
+             self._stream_gemini_api(prompt, context_type='chat', sender="Gemini")
+        else:
+            self.stream_error.emit("Error: No active editor tab found to explain.", 'chat')
+            self.set_context({}) # Clear context on error
+
+    def _cmd_edit_editor(self, args_str, current_dir):
+        """/edit_editor: edits the current editor tab; the next message holds the instructions."""
+        current_widget = self.editor_pane.tab_widget.currentWidget()
+        if current_widget:
+            editor_path_prop = self.editor_pane.get_current_path()
+            filename_hint = os.path.basename(editor_path_prop) if editor_path_prop else "current tab"
+            self.set_context({'action': 'edit_editor', 'path': editor_path_prop if editor_path_prop else 'current tab'})
+            prompt_msg = f"Editing content of '{filename_hint}'. Provide instructions in next message."
+            self.edit_context_set_from_chat.emit(prompt_msg)
+            self.status_update.emit("GemNet", f"Ready for edit instructions for {filename_hint}...")
+        else:
+            self.stream_error.emit("Error: No active editor tab found to edit.", 'chat')
+            self.set_context({}) # Clear context on error
 
 
     # --- set_context (Unchanged) ---
     def set_context(self, context):
         """Allows setting context (like files selected for editing/creation)."""
-        print(f"[Controller CONTEXT] Setting context: {context}")
+        logger.debug("Setting context: %s", context)
         self.current_context = context
 
 # --- END OF FILE gemini_controller.py ---
@@ -3,6 +3,7 @@
 
 import sys
 import os
+import logging
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QSplitter, QStatusBar, QMenu, QLabel)
 from PySide6.QtCore import Qt, Slot, QDir
@@ -122,7 +123,14 @@ class MainWindow(QMainWindow):
         self.select_model_action.setEnabled(False) # Disabled until models are loaded
         model_menu.addSeparator()
         refresh_models_action = model_menu.addAction("Refresh Model List")
-        refresh_models_action.triggered.connect(self.gemini_controller.update_available_models)
+        refresh_models_action.triggered.connect(lambda: self.gemini_controller.update_available_models(force=True)) # Bypass the cached list
+        semantic_cache_action = model_menu.addAction("Reuse Answers to Similar Questions")
+        semantic_cache_action.setCheckable(True)
+        semantic_cache_action.setToolTip("Downloads a small local embedding model on first use")
+        semantic_cache_action.setChecked(self.gemini_controller.semantic_cache.enabled)
+        semantic_cache_action.toggled.connect(self.gemini_controller.set_semantic_cache_enabled)
+        clear_cache_action = model_menu.addAction("Clear Response Cache")
+        clear_cache_action.triggered.connect(self.gemini_controller.clear_cache)
 
     @Slot(list)
     def handle_available_models_update(self, model_names):
@@ -267,9 +275,7 @@ class MainWindow(QMainWindow):
     @Slot(str)
     def handle_stream_chunk(self, chunk):
         """Routes stream_chunk_received signal based on controller's *current* streaming context."""
-        current_stream_context = None
-        if self.gemini_controller._active_worker:
-             current_stream_context = self.gemini_controller._active_worker.context_type
+        current_stream_context = self.gemini_controller.active_context_type # Also set for cached replays
 
         if current_stream_context == 'editor':
             self.editor_pane.handle_stream_chunk(chunk)
@@ -427,6 +433,8 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    # Module loggers stay quiet unless a user lowers this level to opt in to debug output
+    logging.basicConfig(level=logging.WARNING, format="[%(name)s %(levelname)s] %(message)s")
     app = QApplication(sys.argv)
     # app.setStyle('Fusion') # Optional: uncomment to force Fusion style
     window = MainWindow()
@@ -0,0 +1,105 @@
+# --- START OF FILE markdown_cache.py ---
+
+import functools
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+# On-disk cache of rendered Markdown, keyed by a hash of the source text
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "gemnet" / "md"
+MAX_CACHE_ENTRIES = 4096 # Oldest entries are trimmed (FIFO) beyond this...
+TRIM_TO_ENTRIES = MAX_CACHE_ENTRIES * 9 // 10 # ...down to this, so a full cache isn't rescanned on every write
+
+_stats = {"hits": 0, "misses": 0, "write_errors": 0}
+_stats_lock = threading.Lock() # Renders run on the GUI thread and on pool threads
+_entry_count = None # Lazily counted on first write
+_render_lock = threading.Lock() # Markdown instances are shared and not thread-safe
+_store_lock = threading.Lock() # Guards the entry counter and trimming; renders never wait on disk writes
+_markdown = None # The markdown package, imported on first render
+
+
+def _get_markdown():
+    """Imports markdown on first use; its extension machinery is costly to load at startup."""
+    global _markdown
+    if _markdown is None:
+        import markdown as _m
+        _markdown = _m
+    return _markdown
+
+
+@functools.lru_cache(maxsize=None)
+def _get_renderer(extensions: tuple):
+    """Returns a shared Markdown instance per extension set (avoids re-registering extensions)."""
+    return _get_markdown().Markdown(extensions=list(extensions))
+
+
+def render_markdown(body: str, extensions: tuple) -> str:
+    """Converts Markdown to HTML without touching the disk cache."""
+    with _render_lock:
+        md = _get_renderer(extensions)
+        md.reset()
+        return md.convert(body)
+
+
+def md_to_html_cached(body: str, extensions: tuple, cache_dir: Path = DEFAULT_CACHE_DIR) -> str:
+    """Converts Markdown to HTML, reusing a previously rendered result from cache_dir if present."""
+    key = hashlib.sha256(body.encode() + repr(extensions).encode()).hexdigest()[:16]
+    entry = cache_dir / f"{key}.html"
+    try:
+        html = entry.read_text(encoding="utf-8")
+        _count("hits")
+        return html
+    except OSError:
+        pass # Not cached yet (or unreadable), render below
+
+    _count("misses")
+    html = render_markdown(body, extensions)
+    try:
+        with _store_lock:
+            _store(cache_dir, entry, html)
+    except OSError as e:
+        # Cache is best-effort; rendering must never fail because of it
+        _count("write_errors")
+        print(f"[MarkdownCache WARN] Could not write cache entry {entry}: {e}")
+    return html
+
+
+def _count(stat):
+    with _stats_lock: _stats[stat] += 1
+
+
+def _store(cache_dir: Path, entry: Path, html: str):
+    """Writes a cache entry atomically and trims the cache if it grew too large."""
+    global _entry_count
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    if _entry_count is None:
+        _entry_count = sum(1 for _ in cache_dir.glob("*.html"))
+    tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(html, encoding="utf-8")
+    os.replace(tmp, entry) # Readers never see a partially written entry
+    _entry_count += 1
+    if _entry_count > MAX_CACHE_ENTRIES:
+        _trim(cache_dir)
+
+
+def _trim(cache_dir: Path):
+    """Removes the oldest entries until the cache is down to TRIM_TO_ENTRIES."""
+    global _entry_count
+    entries = []
+    for path in cache_dir.glob("*.html"):
+        try: entries.append((path.stat().st_mtime, path))
+        except OSError: continue
+    entries.sort()
+    excess = max(len(entries) - TRIM_TO_ENTRIES, 0)
+    for _, path in entries[:excess]:
+        try: path.unlink()
+        except OSError: pass
+    _entry_count = len(entries) - excess
+
+
+def md_cache_stats() -> dict:
+    """Returns cache counters (hits, misses, write_errors) for debugging."""
+    with _stats_lock: return dict(_stats, entries=_entry_count)
+
+# --- END OF FILE markdown_cache.py ---
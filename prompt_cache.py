@@ -0,0 +1,162 @@
+# --- START OF FILE prompt_cache.py ---
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# On-disk cache of streamed Gemini responses, keyed by a hash of (model, prompt)
+DEFAULT_CACHE_FILE = Path.home() / ".cache" / "gemnet" / "prompts.json"
+DEFAULT_TTL = 3600 # Seconds a cached response stays valid
+MAX_CACHE_ENTRIES = 256 # Least recently used entries are dropped beyond this
+# Paraphrase matching for short chat questions (optional dependencies, see SemanticCache)
+SEMANTIC_MODEL = "all-MiniLM-L6-v2"
+SEMANTIC_THRESHOLD = 0.92 # Minimum cosine similarity to reuse a response
+MAX_SEMANTIC_ENTRIES = 512
+
+
+def prompt_key(model_name: str, prompt: str) -> str:
+    """Returns the cache key for a prompt sent to model_name."""
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """LRU cache of response chunks persisted as one JSON file; safe to use from worker threads."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_FILE, ttl: float = DEFAULT_TTL, max_entries: int = MAX_CACHE_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = None # OrderedDict key -> {"chunks", "ts", "model"}, oldest first; loaded on first use
+        self._lock = threading.Lock() # Workers store results while the GUI thread looks them up
+        self._save_lock = threading.Lock() # Serializes file writes, which happen outside _lock
+        self._version = 0 # Bumped on every change; a write never replaces a newer one on disk
+        self._saved_version = 0
+
+    def get(self, key: str):
+        """Returns the cached chunks for key, or None if missing or expired."""
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is None: return None
+            if time.time() - entry["ts"] > self.ttl:
+                del entries[key]; return None
+            entries.move_to_end(key) # Most recently used
+            return list(entry["chunks"])
+
+    def put(self, key: str, chunks, model_name: str = ""):
+        """Stores a complete response and writes the cache file."""
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"chunks": list(chunks), "ts": time.time(), "model": model_name}
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._version += 1
+            version, snapshot = self._version, dict(entries) # Entry dicts are never modified in place
+        # Serialized and written without holding _lock, so lookups don't wait on the disk
+        with self._save_lock:
+            if version <= self._saved_version: return # A newer snapshot is already on disk
+            try:
+                self._save(snapshot)
+                self._saved_version = version
+            except OSError as e:
+                # Cache is best-effort; a response must never fail because of it
+                logger.warning("Could not write %s: %s", self.path, e)
+
+    def clear(self):
+        """Drops all entries, in memory and on disk."""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._version += 1; version = self._version
+        with self._save_lock:
+            try: self.path.unlink()
+            except OSError: pass
+            self._saved_version = max(self._saved_version, version)
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._entries = OrderedDict((k, v) for k, v in data.items()
+                                            if isinstance(v, dict) and "chunks" in v and "ts" in v)
+            except (OSError, ValueError, AttributeError):
+                self._entries = OrderedDict() # Missing or unreadable: start empty
+        return self._entries
+
+    def _save(self, entries):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entries), encoding="utf-8")
+        os.replace(tmp, self.path) # Readers never see a partially written file
+
+class SemanticCache:
+    """In-memory cache that also matches paraphrased prompts, by cosine similarity of sentence embeddings.
+
+    Off unless enabled is set (the user's opt-in: the model is downloaded on first use). Needs the optional
+    numpy and sentence-transformers packages; without them it stays empty and every lookup misses.
+    Both get() and put() are called from the request's worker thread, since each runs an embedding pass.
+    The embedding model is loaded by the first put(), so get() never waits for it and simply misses until then.
+    """
+
+    def __init__(self, model_name: str = SEMANTIC_MODEL, threshold: float = SEMANTIC_THRESHOLD,
+                 max_entries: int = MAX_SEMANTIC_ENTRIES):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.enabled = False
+        self._model = None # (numpy, SentenceTransformer) once loaded, set as one tuple; False if unavailable
+        self._entries = [] # (llm model name, normalized embedding, chunks), oldest first
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock() # One model load at a time; separate so get() never waits on it
+
+    def get(self, llm_model: str, text: str):
+        """Returns the chunks of the most similar cached prompt for llm_model, or None below the threshold."""
+        model = self._model # One read: numpy and the encoder always come from the same load
+        if not self.enabled or not model: return None
+        with self._lock:
+            candidates = [(emb, chunks) for m, emb, chunks in self._entries if m == llm_model]
+        if not candidates: return None
+        np, encoder = model
+        query = _embed(encoder, text)
+        sims = np.stack([emb for emb, _ in candidates]) @ query # Embeddings are unit length
+        best = int(sims.argmax())
+        return list(candidates[best][1]) if sims[best] >= self.threshold else None
+
+    def put(self, llm_model: str, text: str, chunks):
+        """Stores a complete response; loads the embedding model on first use."""
+        if not self.enabled: return
+        model = self._load_model()
+        if not model: return
+        emb = _embed(model[1], text)
+        with self._lock:
+            self._entries.append((llm_model, emb, list(chunks)))
+            del self._entries[:-self.max_entries]
+
+    def clear(self):
+        with self._lock: self._entries = []
+
+    def _load_model(self):
+        """Returns (numpy, encoder), loading them on first use; False if they can't be loaded."""
+        with self._load_lock:
+            if self._model is None:
+                try:
+                    import numpy
+                    from sentence_transformers import SentenceTransformer
+                    self._model = (numpy, SentenceTransformer(self.model_name)) # Published together
+                except Exception as e: # Not installed, or the model can't be loaded/downloaded
+                    logger.warning("Semantic cache disabled: %s", e)
+                    self._model = False
+            return self._model
+
+
+def _embed(encoder, text):
+    return encoder.encode(text, normalize_embeddings=True, convert_to_numpy=True)
+
+# --- END OF FILE prompt_cache.py ---
@@ -5,10 +5,31 @@ from PySide6.QtCore import QRegularExpression
 import re # Using re for slightly easier multi-line handling maybe
 
 class PythonHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent=None):
+    _RULES = None # [(QRegularExpression, QTextCharFormat)], compiled once and shared by every instance
+
+    def __init__(self, parent=None, rules=None):
         super().__init__(parent)
 
-        self.highlightingRules = []
+        self.highlightingRules = rules if rules is not None else self.get_shared_rules()
+
+        # Multi-line strings ("""...""" and '''...''') - Basic State Handling
+        self.multiLineStringFormat = QTextCharFormat()
+        self.multiLineStringFormat.setForeground(QColor("#CE9178")) # Orange/Brown
+        self.tripleSingleQuoteStartRegex = QRegularExpression("'''")
+        self.tripleDoubleQuoteStartRegex = QRegularExpression('"""')
+        self.tripleSingleQuoteEndRegex = QRegularExpression("'''")
+        self.tripleDoubleQuoteEndRegex = QRegularExpression('"""')
+
+    @classmethod
+    def get_shared_rules(cls):
+        """Returns the single-line highlighting rules, compiling them on first use."""
+        if cls._RULES is None:
+            cls._RULES = cls._build_rules()
+        return cls._RULES
+
+    @staticmethod
+    def _build_rules():
+        rules = []
 
         # Keywords
         keywordFormat = QTextCharFormat()
@@ -22,7 +43,7 @@ class PythonHighlighter(QSyntaxHighlighter):
             "\\bnot\\b", "\\bor\\b", "\\bpass\\b", "\\braise\\b", "\\breturn\\b", "\\btry\\b",
             "\\bwhile\\b", "\\bwith\\b", "\\byield\\b", "\\basync\\b", "\\bawait\\b"
         ]
-        self.highlightingRules.extend([(QRegularExpression(pattern), keywordFormat) for pattern in keywords])
+        rules.extend([(QRegularExpression(pattern), keywordFormat) for pattern in keywords])
 
         # Built-in functions/types (subset)
         builtinFormat = QTextCharFormat()
@@ -32,38 +53,31 @@ class PythonHighlighter(QSyntaxHighlighter):
             "\\bdict\\b", "\\bset\\b", "\\btuple\\b", "\\brange\\b", "\\btype\\b", "\\bsuper\\b",
             "\\bself\\b", "\\bcls\\b" # Treat self/cls like builtins for visibility
         ]
-        self.highlightingRules.extend([(QRegularExpression(pattern), builtinFormat) for pattern in builtins])
+        rules.extend([(QRegularExpression(pattern), builtinFormat) for pattern in builtins])
 
 
         # Decorators
         decoratorFormat = QTextCharFormat()
         decoratorFormat.setForeground(QColor("#DCDCAA")) # Yellowish
-        self.highlightingRules.append((QRegularExpression("^\\s*@\\w+"), decoratorFormat))
+        rules.append((QRegularExpression("^\\s*@\\w+"), decoratorFormat))
 
         # Single-line strings ('...' and "...")
         stringFormat = QTextCharFormat()
         stringFormat.setForeground(QColor("#CE9178")) # Orange/Brown
-        self.highlightingRules.append((QRegularExpression("'[^'\\\\]*(\\\\.[^'\\\\]*)*'"), stringFormat))
-        self.highlightingRules.append((QRegularExpression("\"[^\"\\\\]*(\\\\.[^\"\\\\]*)*\""), stringFormat))
+        rules.append((QRegularExpression("'[^'\\\\]*(\\\\.[^'\\\\]*)*'"), stringFormat))
+        rules.append((QRegularExpression("\"[^\"\\\\]*(\\\\.[^\"\\\\]*)*\""), stringFormat))
 
         # Numbers
         numberFormat = QTextCharFormat()
         numberFormat.setForeground(QColor("#B5CEA8")) # Greenish
-        self.highlightingRules.append((QRegularExpression("\\b[0-9]+\\.?[0-9]*([eE][-+]?[0-9]+)?\\b"), numberFormat)) # Float/Int/Scientific
+        rules.append((QRegularExpression("\\b[0-9]+\\.?[0-9]*([eE][-+]?[0-9]+)?\\b"), numberFormat)) # Float/Int/Scientific
 
         # Comments (#...)
         commentFormat = QTextCharFormat()
         commentFormat.setForeground(QColor("#6A9955")) # Green
         commentFormat.setFontItalic(True)
-        self.highlightingRules.append((QRegularExpression("#[^\n]*"), commentFormat))
-
-        # Multi-line strings ("""...""" and '''...''') - Basic State Handling
-        self.multiLineStringFormat = QTextCharFormat()
-        self.multiLineStringFormat.setForeground(QColor("#CE9178")) # Orange/Brown
-        self.tripleSingleQuoteStartRegex = QRegularExpression("'''")
-        self.tripleDoubleQuoteStartRegex = QRegularExpression('"""')
-        self.tripleSingleQuoteEndRegex = QRegularExpression("'''")
-        self.tripleDoubleQuoteEndRegex = QRegularExpression('"""')
+        rules.append((QRegularExpression("#[^\n]*"), commentFormat))
+        return rules
 
 
     def highlightBlock(self, text):
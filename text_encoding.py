@@ -0,0 +1,49 @@
+# --- START OF FILE text_encoding.py ---
+
+try: # Optional: better guesses for non-UTF-8 files
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+try: # Optional fallback detector if charset_normalizer is missing
+    import chardet
+except ImportError:
+    chardet = None
+
+# Shared by the editor and the prompt builder, so a file reads the same in a tab and in a prompt
+DETECT_PREFIX_BYTES = 64 * 1024 # How much of a non-UTF-8 file the encoding detector looks at
+
+
+def detect_encoding(raw):
+    """Guesses the encoding of non-UTF-8 bytes from their prefix; None if no detector is available or sure."""
+    sample = raw[:DETECT_PREFIX_BYTES]
+    if charset_normalizer is not None:
+        matches = charset_normalizer.from_bytes(sample)
+        best = matches.best()
+        if best is None: return None
+        # Western text often scores the same in several code pages; prefer the most common one
+        ties = [m.encoding for m in matches if (m.chaos, m.coherence) == (best.chaos, best.coherence)]
+        return 'cp1252' if 'cp1252' in ties else best.encoding
+    if chardet is not None:
+        return chardet.detect(sample).get('encoding')
+    return None
+
+
+def decode_text(raw, errors='strict'):
+    """Decodes file bytes (bytes or any buffer, e.g. an mmap) and returns (content, encoding_used).
+
+    With errors='strict' a guessed encoding must decode every byte, else latin-1 is used: it maps each byte
+    to one character, so nothing turns into U+FFFD and is lost when the editor saves the text back.
+    """
+    try:
+        return str(raw, 'utf-8'), 'utf-8' # Fast path for the common case
+    except UnicodeDecodeError:
+        pass
+    encoding = detect_encoding(raw)
+    if encoding:
+        try:
+            return str(raw, encoding, errors), encoding
+        except (UnicodeDecodeError, LookupError): # Wrong guess, or a codec Python doesn't know
+            pass
+    return str(raw, 'latin-1'), 'latin-1' # latin-1 decodes any byte sequence
+
+# --- END OF FILE text_encoding.py ---